@@ -2,19 +2,29 @@
 
 echo "Waiting for postgres..."
 while ! nc -z $DB_HOST $DB_PORT; do
-  sleep 0.1
+  sleep 0.4
 done
-echo "PostgreSQL started"
 
-echo "Applying database migrations..."
-python manage.py makemigrations
-python manage.py migrate
-
-echo "Loading initial data (tags and ingredients)..."
-python manage.py setup_initial_data
-
-echo "Collecting static files..."
-python manage.py collectstatic --noinput
+if [ "$WAIT_FOR_MIGRATIONS" = "1" ]; then
+  # Фоновые процессы не мигрируют сами, а ждут контейнер backend.
+  echo "Waiting for migrations..."
+  until python manage.py migrate --check > /dev/null 2>&1; do
+    sleep 2
+  done
+else
+  # Таблица общего кеша; если она уже есть, команда ничего не делает.
+  # Создаётся до начальных данных: сигналы сохранения пишут в кеш.
+  python manage.py createcachetable
+  # Миграции и начальные данные — только если схема отстала от кода:
+  # проверка состояния занимает один запрос к django_migrations.
+  if python manage.py migrate --check > /dev/null; then
+    echo "Migrations are up to date"
+  else
+    python manage.py migrate
+    python manage.py setup_initial_data
+  fi
+  python manage.py collectstatic --noinput
+fi
 
 echo "Starting server..."
-exec "$@"
\ No newline at end of file
+exec "$@"
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def shared_key(key):
+    return f'auth-token:{key}'
+
+
+def invalidate_token(key):
+    cache.delete(shared_key(key))
+
+
+def invalidate_user_tokens(user):
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к БД на каждый вызов.
+
+    Пользователь по ключу токена ищется в общем для всех процессов кеше
+    Django (settings.CACHES) и только потом в базе. Записи сбрасываются
+    сигналами (api.signals) при выходе, смене пароля, деактивации и любом
+    сохранении пользователя, поэтому изменение сразу видно всем процессам.
+    Локального кеша в процессе нет: его копия пользователя устаревала бы
+    до истечения срока независимо от сброса.
+    """
+
+    def authenticate_credentials(self, key):
+        user = cache.get(shared_key(key))
+        if user is None:
+            user, _token = super().authenticate_credentials(key)
+            cache.set(shared_key(key), user,
+                      getattr(settings, 'TOKEN_CACHE_SHARED_TTL', 300))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+        return user, Token(key=key, user=user)
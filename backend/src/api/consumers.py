@@ -0,0 +1,10 @@
+from core.events import consumer
+from recipes.models import MealPlan, RecipeComponent
+from .meal_plans import bump_plan_versions
+
+
+@consumer('meal_plans', models=(RecipeComponent,))
+def refresh_meal_plans(batch):
+    recipe_ids = {event.payload['recipe'] for event in batch}
+    bump_plan_versions(*MealPlan.objects.filter(
+        recipe_id__in=recipe_ids).values_list('user_id', flat=True).distinct())
@@ -0,0 +1,171 @@
+"""Быстрая сборка ответов для нагруженных эндпоинтов чтения.
+
+Данные читаются плоскими строками через values(), а вложенный JSON
+собирается заранее подготовленными отображениями строк. Вывод
+совпадает с RecipeReadSerializer поле в поле. При разреженном наборе
+полей (api.fieldsets) читаются только нужные столбцы, а состав и
+флаги пользователя не запрашиваются, если их нет в ответе.
+"""
+from operator import itemgetter
+
+from django.db.models import Exists, OuterRef
+from rest_framework.fields import DecimalField
+
+from recipes.models import GroceryList, Recipe, RecipeComponent, UserFavorite
+from users.models import Subscription
+from .fieldsets import Fieldset
+from .media import MediaURLBuilder
+
+RECIPE_FIELDS = (
+    'id', 'author', 'ingredients', 'is_favorited', 'is_in_shopping_cart',
+    'name', 'image', 'text', 'cooking_time',
+    'total_calories', 'total_proteins', 'total_fats', 'total_carbohydrates',
+    'total_price',
+)
+AUTHOR_FIELDS = (
+    'email', 'id', 'username', 'first_name', 'last_name', 'is_subscribed',
+    'avatar',
+)
+COMPONENT_FIELDS = ('id', 'name', 'measurement_unit', 'amount')
+COMPONENT_COLUMNS = (
+    'recipe_id', 'ingredient_id', 'ingredient__name',
+    'ingredient__measurement_unit', 'amount',
+)
+FLAGS = ('is_favorited', 'is_in_shopping_cart', 'is_subscribed')
+_price = Recipe._meta.get_field('total_price')
+# Decimal в ответе — строка, как у DecimalField в ModelSerializer.
+PRICE = DecimalField(_price.max_digits, _price.decimal_places, read_only=True)
+
+
+class RowMapper:
+    """Отображение строки values() в словарь ответа.
+
+    fields — пары (ключ ответа, функция от строки); порядок пар задаёт
+    порядок ключей в ответе.
+    """
+    __slots__ = ('keys', 'getters')
+
+    def __init__(self, fields):
+        self.keys = tuple(key for key, _ in fields)
+        self.getters = tuple(getter for _, getter in fields)
+
+    def __call__(self, row):
+        return dict(zip(self.keys, [getter(row) for getter in self.getters]))
+
+
+class FastRecipeReadSerializer:
+    """Сериализует рецепты по списку id за два запроса."""
+
+    def __init__(self, request, fieldset=None):
+        self.user = request.user if request else None
+        self.media = MediaURLBuilder.for_request(request)
+        fieldset = fieldset or Fieldset()
+        self.columns = {'id'}
+        self.flags = []
+        self.component = None
+        self.component_columns = COMPONENT_COLUMNS
+
+        recipe = []
+        for name in fieldset.select(RECIPE_FIELDS):
+            if name == 'author':
+                getter = self.author_mapper(fieldset.nested('author'))
+            elif name == 'ingredients':
+                self.component = self.component_mapper(
+                    fieldset.nested('ingredients'))
+                getter = itemgetter('ingredients')
+            elif name in FLAGS:
+                self.flags.append(name)
+                getter = itemgetter(name)
+            elif name == 'image':
+                self.columns.add('image')
+                getter = self.image_url
+            elif name == 'total_price':
+                self.columns.add(name)
+                getter = self.price
+            else:
+                self.columns.add(name)
+                getter = itemgetter(name)
+            recipe.append((name, getter))
+        self.recipe = RowMapper(recipe)
+
+    def author_mapper(self, fieldset):
+        self.columns.add('author_id')
+        if fieldset is None:
+            return itemgetter('author_id')
+        author = []
+        for name in fieldset.select(AUTHOR_FIELDS):
+            if name == 'id':
+                getter = itemgetter('author_id')
+            elif name == 'is_subscribed':
+                self.flags.append(name)
+                getter = itemgetter(name)
+            elif name == 'avatar':
+                self.columns.add('author__avatar')
+                getter = self.avatar_url
+            else:
+                self.columns.add(f'author__{name}')
+                getter = itemgetter(f'author__{name}')
+            author.append((name, getter))
+        return RowMapper(author)
+
+    def component_mapper(self, fieldset):
+        if fieldset is None:
+            self.component_columns = COMPONENT_COLUMNS[:2]
+            return itemgetter(1)
+        getters = {
+            'id': itemgetter(1),
+            'name': itemgetter(2),
+            'measurement_unit': itemgetter(3),
+            'amount': itemgetter(4),
+        }
+        return RowMapper([(name, getters[name])
+                          for name in fieldset.select(COMPONENT_FIELDS)])
+
+    def image_url(self, row):
+        return self.media.url(row['image'])
+
+    def price(self, row):
+        value = row['total_price']
+        return None if value is None else PRICE.to_representation(value)
+
+    def avatar_url(self, row):
+        return self.media.url(row['author__avatar'])
+
+    def get_rows(self, recipe_ids):
+        queryset = Recipe.objects.filter(pk__in=recipe_ids)
+        flags = self.flags
+        if flags and self.user and self.user.is_authenticated:
+            subqueries = {
+                'is_favorited': Exists(UserFavorite.objects.filter(
+                    user=self.user, recipe=OuterRef('pk'))),
+                'is_in_shopping_cart': Exists(GroceryList.objects.filter(
+                    user=self.user, recipe=OuterRef('pk'))),
+                'is_subscribed': Exists(Subscription.objects.filter(
+                    user=self.user, author=OuterRef('author_id'))),
+            }
+            queryset = queryset.annotate(
+                **{flag: subqueries[flag] for flag in flags})
+        else:
+            flags = ()
+        rows = queryset.values(*self.columns, *flags).order_by()
+        if self.flags and not flags:
+            defaults = dict.fromkeys(self.flags, False)
+            rows = [dict(row, **defaults) for row in rows]
+        return {row['id']: row for row in rows}
+
+    def serialize(self, recipe_ids):
+        """Возвращает данные рецептов в порядке recipe_ids."""
+        rows = self.get_rows(recipe_ids)
+
+        component = self.component
+        if component is not None:
+            for row in rows.values():
+                row['ingredients'] = []
+            components = RecipeComponent.objects.filter(
+                recipe_id__in=list(rows)
+            ).order_by('id').values_list(*self.component_columns)
+            for item in components:
+                rows[item[0]]['ingredients'].append(component(item))
+
+        recipe = self.recipe
+        return [recipe(rows[pk]) for pk in recipe_ids if pk in rows]
@@ -0,0 +1,55 @@
+"""Разреженные наборы полей: параметры ?fields= и ?expand=.
+
+Без ?fields= ответ полный. С ним в ответе остаются только перечисленные
+поля, а вложенные объекты отдаются идентификаторами, если они не
+перечислены в ?expand= и для них не указаны подполя (author.username).
+Сериализаторы по набору полей сокращают и сами запросы к базе.
+"""
+
+
+class Fieldset:
+    def __init__(self, fields=None, expand=()):
+        # None — все поля; иначе {поле: {подполя}}.
+        self.fields = fields
+        self.expand = frozenset(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params if request is not None else {}
+        raw = params.get('fields', '')
+        if not raw.strip():
+            return cls()
+        fields = {}
+        for item in raw.split(','):
+            name, _, subfield = item.strip().partition('.')
+            if name:
+                subfields = fields.setdefault(name, set())
+                if subfield:
+                    subfields.add(subfield)
+        expand = {
+            name.strip() for name in params.get('expand', '').split(',')
+            if name.strip()
+        }
+        return cls(fields, expand)
+
+    @property
+    def is_sparse(self):
+        return self.fields is not None
+
+    def __contains__(self, name):
+        return self.fields is None or name in self.fields
+
+    def select(self, names):
+        """Оставляет из names запрошенные поля, сохраняя порядок."""
+        return [name for name in names if name in self]
+
+    def nested(self, name):
+        """Набор полей вложенного объекта; None — отдавать только id."""
+        if self.fields is None:
+            return Fieldset()
+        subfields = self.fields.get(name)
+        if subfields:
+            return Fieldset({subfield: set() for subfield in subfields})
+        if name in self.expand:
+            return Fieldset()
+        return None
@@ -1,5 +1,20 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
-from recipes.models import Recipe, Ingredient
+from recipes.models import Recipe, Ingredient, RecipeComponent
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """Сортировка с id последним ключом, чтобы страницы не перемешивались."""
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            qs = qs.order_by(*qs.query.order_by, '-pk')
+        return qs
 
 
 class IngredientFilter(filters.FilterSet):
@@ -15,10 +30,43 @@ class RecipeFilter(filters.FilterSet):
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
+    min_kcal = filters.NumberFilter(
+        field_name='total_calories', lookup_expr='gte')
+    max_kcal = filters.NumberFilter(
+        field_name='total_calories', lookup_expr='lte')
+    max_price = filters.NumberFilter(
+        field_name='total_price', lookup_expr='lte')
+    min_cooking_time = filters.NumberFilter(
+        field_name='cooking_time', lookup_expr='gte')
+    max_cooking_time = filters.NumberFilter(
+        field_name='cooking_time', lookup_expr='lte')
+    ingredients = NumberInFilter(method='filter_ingredients')
+    exclude_ingredients = NumberInFilter(method='filter_exclude_ingredients')
+    ordering = StableOrderingFilter(
+        fields=('cooking_time', 'pub_date', 'name'))
 
     class Meta:
         model = Recipe
-        fields = ('author', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('author', 'is_favorited', 'is_in_shopping_cart',
+                  'min_kcal', 'max_kcal', 'max_price',
+                  'min_cooking_time', 'max_cooking_time',
+                  'ingredients', 'exclude_ingredients')
+
+    @staticmethod
+    def components(ingredient_ids):
+        return RecipeComponent.objects.filter(
+            recipe=OuterRef('pk'), ingredient_id__in=ingredient_ids)
+
+    def filter_ingredients(self, queryset, name, value):
+        # Рецепт должен содержать все ингредиенты: по полусоединению
+        # на каждый, без JOIN и distinct().
+        for ingredient_id in set(value):
+            queryset = queryset.filter(
+                Exists(self.components([ingredient_id])))
+        return queryset
+
+    def filter_exclude_ingredients(self, queryset, name, value):
+        return queryset.filter(~Exists(self.components(value)))
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.fast_serializers import FastRecipeReadSerializer
+from api.renderers import FastJSONRenderer, MessagePackRenderer
+from api.serializers import IngredientSerializer
+from core import compression
+from recipes.models import Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    help = ('Сравнение форматов ответа: размер и время кодирования '
+            'для списка ингредиентов и страницы рецептов')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=100,
+            help='Число рецептов на странице',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Число повторов для замера времени',
+        )
+
+    def payloads(self, options):
+        recipe_ids = list(Recipe.objects.values_list(
+            'pk', flat=True)[:options['recipes']])
+        return {
+            'ингредиенты': IngredientSerializer(
+                Ingredient.objects.all(), many=True).data,
+            f'рецепты ({len(recipe_ids)})':
+                FastRecipeReadSerializer(None).serialize(recipe_ids),
+        }
+
+    def renderers(self):
+        renderers = {'json (drf)': JSONRenderer(), 'json': FastJSONRenderer()}
+        if MessagePackRenderer.available:
+            renderers['msgpack'] = MessagePackRenderer()
+        return renderers
+
+    def measure(self, func, repeat):
+        """Медиана времени вызова в миллисекундах и результат."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return timings[len(timings) // 2] * 1000, result
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        encodings = [compression.IDENTITY, *compression.ENCODERS]
+        self.stdout.write(
+            f'{"данные":<16} {"формат":<11} {"сжатие":<9} '
+            f'{"байт":>10} {"рендер, мс":>11} {"сжатие, мс":>11}')
+        for name, data in self.payloads(options).items():
+            for format, renderer in self.renderers().items():
+                render_time, content = self.measure(
+                    lambda: renderer.render(data), repeat)
+                for encoding in encodings:
+                    compress_time, body = self.measure(
+                        lambda: compression.compress(content, encoding),
+                        repeat)
+                    self.stdout.write(
+                        f'{name:<16} {format:<11} {encoding:<9} '
+                        f'{len(body):>10} {render_time:>11.2f} '
+                        f'{compress_time:>11.2f}')
@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PATHS = ('/api/ingredients/', '/api/recipes/', '/api/users/')
+
+# Выполняется в отдельном интерпретаторе, чтобы процесс был холодным.
+SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import foodgram.wsgi
+result = {'import': time.perf_counter() - started}
+from django.test import Client
+if sys.argv[1] == 'warm':
+    from api.warmup import warm_up
+    started = time.perf_counter()
+    warm_up()
+    result['warmup'] = time.perf_counter() - started
+client = Client(HTTP_HOST=sys.argv[2])
+for path in sys.argv[3:]:
+    started = time.perf_counter()
+    client.get(path)
+    result[path] = time.perf_counter() - started
+print(json.dumps(result))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Замер импорта foodgram.wsgi и первых запросов '
+            'в холодном и прогретом процессе')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Число запусков процесса на режим',
+        )
+        parser.add_argument(
+            '--importtime',
+            type=int,
+            default=0,
+            metavar='N',
+            help='Показать N самых долгих импортов (python -X importtime)',
+        )
+
+    def run(self, *args, options=()):
+        host = next((host for host in settings.ALLOWED_HOSTS
+                     if host not in ('*', '')), 'localhost').lstrip('.')
+        env = dict(os.environ,
+                   DJANGO_SETTINGS_MODULE=os.environ.get(
+                       'DJANGO_SETTINGS_MODULE', 'foodgram.settings'))
+        completed = subprocess.run(
+            [sys.executable, *options, '-c', SCRIPT, *args, host, *PATHS],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if completed.returncode:
+            raise CommandError(completed.stderr.strip())
+        return completed
+
+    def measure(self, mode, repeat):
+        """Медианы времени каждого шага по нескольким запускам."""
+        runs = [json.loads(self.run(mode).stdout.splitlines()[-1])
+                for _ in range(repeat)]
+        return {
+            step: sorted(run[step] for run in runs)[repeat // 2]
+            for step in runs[0]
+        }
+
+    def show_imports(self, count):
+        stderr = self.run('cold', options=('-X', 'importtime')).stderr
+        imports = []
+        for line in stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                imports.append((int(cumulative), name.strip()))
+        self.stdout.write('Самые долгие импорты (с вложенными), мс:')
+        for cumulative, name in sorted(imports, reverse=True)[:count]:
+            self.stdout.write(f'{cumulative / 1000:>10.1f}  {name}')
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        cold = self.measure('cold', repeat)
+        warm = self.measure('warm', repeat)
+        self.stdout.write(f'{"шаг":<24} {"холодный, мс":>13} '
+                          f'{"прогретый, мс":>14}')
+        for step in warm:
+            before = f'{cold[step] * 1000:>13.1f}' if step in cold else (
+                f'{"—":>13}')
+            self.stdout.write(
+                f'{step:<24} {before} {warm[step] * 1000:>14.1f}')
+        if options['importtime']:
+            self.show_imports(options['importtime'])
@@ -0,0 +1,61 @@
+"""Список покупок по плану питания за период.
+
+Список считается одним сгруппированным запросом по плану с учётом
+порций, сводится по единицам (recipes.quantities) и кешируется с ключом
+из версии плана пользователя. Версия сбрасывается при изменении плана
+(сигналы и пакетное редактирование) и при изменении состава
+запланированных рецептов (обработчик событий в api.consumers, который
+работает в процессе process_events). Версия лежит в общем кеше
+(settings.CACHES), поэтому сброс виден всем воркерам, и живёт не
+дольше CACHE_TTL.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+
+from recipes import quantities
+from recipes.models import MealPlan
+
+CACHE_TTL = 24 * 60 * 60
+
+
+def version_key(user_id):
+    return f'meal-plan-version:{user_id}'
+
+
+def plan_version(user_id):
+    return cache.get_or_set(
+        version_key(user_id), lambda: uuid.uuid4().hex, CACHE_TTL)
+
+
+def bump_plan_versions(*user_ids):
+    cache.delete_many([version_key(user_id) for user_id in user_ids])
+
+
+def build_plan_shopping_list(user_id, start, end):
+    rows = MealPlan.objects.filter(
+        user_id=user_id, date__range=(start, end),
+        recipe__deleted_at__isnull=True,
+    ).values(
+        name=F('recipe__components__ingredient__name'),
+        unit=F('recipe__components__ingredient__measurement_unit'),
+    ).annotate(
+        amount=Sum(F('recipe__components__amount') * F('servings')),
+    ).filter(name__isnull=False).order_by()
+    return [
+        {'name': item.name, 'measurement_unit': item.unit,
+         'amount': quantities.format_amount(item.amount)}
+        for item in quantities.aggregate(
+            rows, name_key='name', unit_key='unit')
+    ]
+
+
+def get_plan_shopping_list(user_id, start, end):
+    key = (f'meal-plan-list:{user_id}:{plan_version(user_id)}:'
+           f'{start.isoformat()}:{end.isoformat()}')
+    items = cache.get(key)
+    if items is None:
+        items = build_plan_shopping_list(user_id, start, end)
+        cache.set(key, items, CACHE_TTL)
+    return items
@@ -0,0 +1,64 @@
+import hashlib
+import time
+from base64 import urlsafe_b64encode
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+
+
+class MediaURLBuilder:
+    """Строит абсолютные ссылки на медиафайлы склейкой строк.
+
+    Префикс (CDN или адрес текущего хоста + MEDIA_URL) вычисляется один
+    раз на запрос. Если задан MEDIA_URL_SIGNING_KEY, к ссылке
+    добавляется подпись в формате nginx secure_link:
+    md5("<expires><path> <key>"), срок округляется вверх до
+    MEDIA_URL_TTL, чтобы ссылки оставались кешируемыми.
+    """
+    __slots__ = ('prefix', 'path_prefix', 'signing_key', 'expires')
+
+    def __init__(self, request=None):
+        origin = getattr(settings, 'MEDIA_CDN_ORIGIN', '')
+        if origin:
+            self.prefix = origin.rstrip('/') + settings.MEDIA_URL
+        elif request is not None:
+            self.prefix = request.build_absolute_uri(settings.MEDIA_URL)
+        else:
+            self.prefix = settings.MEDIA_URL
+        self.path_prefix = settings.MEDIA_URL
+        self.signing_key = getattr(settings, 'MEDIA_URL_SIGNING_KEY', '')
+        if self.signing_key:
+            ttl = getattr(settings, 'MEDIA_URL_TTL', 3600)
+            self.expires = (int(time.time()) // ttl + 2) * ttl
+
+    @classmethod
+    def for_request(cls, request):
+        if request is None:
+            return cls()
+        builder = getattr(request, '_media_url_builder', None)
+        if builder is None:
+            builder = request._media_url_builder = cls(request)
+        return builder
+
+    def url(self, name):
+        if not name:
+            return None
+        if not isinstance(default_storage, FileSystemStorage):
+            return default_storage.url(name)
+        path = filepath_to_uri(name)
+        if not self.signing_key:
+            return self.prefix + path
+        digest = hashlib.md5(
+            f'{self.expires}{self.path_prefix}{path} {self.signing_key}'
+            .encode()
+        ).digest()
+        signature = urlsafe_b64encode(digest).rstrip(b'=').decode()
+        return (f'{self.prefix}{path}'
+                f'?md5={signature}&expires={self.expires}')
+
+
+def media_url(context, file):
+    """Ссылка на файл поля для сериализатора с context['request']."""
+    return MediaURLBuilder.for_request(context.get('request')).url(
+        file.name if file else None)
@@ -1,6 +1,22 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class RevisionPagination(CursorPagination):
+    """Постраничный вывод по ключу: OFFSET не растёт с длиной истории."""
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class NotificationPagination(CursorPagination):
+    ordering = '-created'
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
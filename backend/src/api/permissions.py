@@ -14,3 +14,10 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS
             or obj.author == request.user
         )
+
+
+class IsAuthorOrStaff(permissions.BasePermission):
+    """Доступ к объекту только автору и персоналу, в том числе на чтение."""
+
+    def has_object_permission(self, request, view, obj):
+        return obj.author_id == request.user.id or request.user.is_staff
@@ -0,0 +1,68 @@
+"""Заранее отрендеренные и сжатые ответы для статичных справочников.
+
+Тело ответа строится один раз на версию справочника, формат и
+кодировку и хранится в кеше уже сжатым с максимальным уровнем.
+Версия лежит в общем кеше (settings.CACHES) и сбрасывается сигналами
+(api.signals) и командами загрузки данных, в каком бы процессе они ни
+работали. Срок жизни версии ограничен CACHE_TTL, так что изменение
+в обход сигналов тоже попадёт в ответ не позже чем через сутки.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.response import Response
+
+from core import compression
+
+CACHEABLE_FORMATS = ('json', 'msgpack')
+# Тела старых версий вытесняются сами, без явного удаления.
+CACHE_TTL = 24 * 60 * 60
+
+
+def version_key(catalogue):
+    return f'catalogue-version:{catalogue}'
+
+
+def catalogue_version(catalogue):
+    return cache.get_or_set(
+        version_key(catalogue), lambda: uuid.uuid4().hex, CACHE_TTL)
+
+
+def bump_catalogue_version(catalogue):
+    cache.delete(version_key(catalogue))
+
+
+def precompressed_response(view, catalogue, get_data):
+    """Ответ с телом из кеша; get_data вызывается только при промахе."""
+    request = view.request
+    renderer = request.accepted_renderer
+    if (renderer.format not in CACHEABLE_FORMATS
+            or request.accepted_media_type != renderer.media_type):
+        return Response(get_data())
+
+    encoding = compression.choose_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    ) or compression.IDENTITY
+    key = (f'precompressed:{catalogue}:{catalogue_version(catalogue)}:'
+           f'{renderer.format}:{encoding}')
+    cached = cache.get(key)
+    if cached is None:
+        content = renderer.render(
+            get_data(), renderer.media_type, view.get_renderer_context())
+        if len(content) < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024):
+            encoding = compression.IDENTITY
+        cached = (encoding, compression.compress(content, encoding, best=True))
+        cache.set(key, cached, CACHE_TTL)
+
+    encoding, body = cached
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+    response = HttpResponse(body, content_type=content_type)
+    if encoding != compression.IDENTITY:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
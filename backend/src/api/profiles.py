@@ -0,0 +1,54 @@
+"""Кешируемая часть страницы автора.
+
+В кеше лежит то, что одинаково для всех читателей: карточка автора,
+счётчики и id рецептов первой страницы. Признак подписки и сами
+рецепты с флагами избранного собираются для каждого запроса отдельно.
+Записи сбрасываются сигналами (api.signals) и явно там, где изменения
+идут в обход ORM.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core.admin import subquery_count
+from recipes.models import Recipe
+from users.models import Subscription, User
+from .pagination import CustomPagination
+
+CARD_FIELDS = ('email', 'id', 'username', 'first_name', 'last_name')
+
+
+def profile_key(author_id):
+    return f'author-profile:{author_id}'
+
+
+def invalidate_author_profiles(*author_ids):
+    cache.delete_many([profile_key(author_id) for author_id in author_ids])
+
+
+def build_author_profile(author_id):
+    profile = User.objects.filter(pk=author_id).annotate(
+        recipes_count=subquery_count(Recipe.objects.all(), 'author'),
+        subscribers_count=subquery_count(Subscription.objects.filter(
+            user__deleted_at__isnull=True), 'author'),
+        subscriptions_count=subquery_count(Subscription.objects.filter(
+            author__deleted_at__isnull=True), 'user'),
+    ).values(*CARD_FIELDS, 'avatar', 'recipes_count', 'subscribers_count',
+             'subscriptions_count').first()
+    if profile is not None:
+        profile['recipe_ids'] = list(
+            Recipe.objects.filter(author_id=author_id).order_by(
+                '-pub_date').values_list('pk', flat=True)[
+                :CustomPagination.page_size])
+    return profile
+
+
+def get_author_profile(author_id):
+    """Данные профиля из кеша; None, если автора нет."""
+    key = profile_key(author_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = build_author_profile(author_id)
+        if profile is not None:
+            cache.set(key, profile,
+                      getattr(settings, 'AUTHOR_PROFILE_CACHE_TTL', 600))
+    return profile
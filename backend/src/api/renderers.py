@@ -0,0 +1,76 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson.
+
+    Типы, которые orjson кодирует иначе, чем DRF (даты, Decimal, UUID,
+    ленивые строки), передаются в encoder_class, поэтому без float вывод
+    совпадает с JSONRenderer побайтно (api.tests). Числа с плавающей
+    точкой orjson записывает по-своему: 0.00001 вместо 1e-05, 1e16
+    вместо 1e+16, а NaN и бесконечности — null. При запросе отступов,
+    ASCII-вывода или без установленного orjson используется json.
+    """
+    options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        if orjson else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=self.options)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Ответ в MessagePack для клиентов с Accept: application/msgpack.
+
+    Даты, Decimal и UUID кодируются строками так же, как в JSON.
+    Без пакета msgpack рендерер недоступен для выбора.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    available = msgpack is not None
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(
+            data, default=self.encoder_class().default, use_bin_type=True)
+
+
+class AvailableRenderersNegotiation(DefaultContentNegotiation):
+    """Не предлагает рендереры, для которых не установлены зависимости."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return super().select_renderer(
+            request,
+            [renderer for renderer in renderers
+             if getattr(renderer, 'available', True)],
+            format_suffix,
+        )
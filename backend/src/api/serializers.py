@@ -1,17 +1,61 @@
 from rest_framework import serializers
 from django.db import transaction
 from django.core.files.base import ContentFile
+from django.utils.functional import cached_property
 import base64
 import uuid
 from djoser.serializers import UserSerializer as BaseUserSerializer
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 
+from core import events
+from core.models import Job
+from recipes import revisions
+from recipes.nutrition import recompute_totals
 from recipes.models import (Recipe, Ingredient,
                             RecipeComponent, UserFavorite,
-                            GroceryList)
+                            GroceryList, MealPlan, RecipeRevision,
+                            IngredientUsage, Notification,
+                            NotificationInbox)
 from users.models import User, Subscription
 from drf_extra_fields.fields import Base64ImageField
 
+from .fieldsets import Fieldset
+from .media import media_url
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе поля из ?fields= (api.fieldsets).
+
+    Действует только на корневой сериализатор ответа; вложенный
+    урезается, если ему передан свой набор полей (fieldset=...).
+    """
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        self.nested_fieldset = fieldset
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def fieldset(self):
+        if self.nested_fieldset is not None:
+            return self.nested_fieldset
+        return Fieldset.from_request(self.context.get('request'))
+
+    @property
+    def is_sparse(self):
+        """Урезается ли вывод этого сериализатора."""
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return ((parent is None or self.nested_fieldset is not None)
+                and self.fieldset.is_sparse)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.is_sparse:
+            fieldset = self.fieldset
+            fields = {name: fields[name] for name in fieldset.select(fields)}
+        return fields
+
 
 class UserCreateSerializer(BaseUserCreateSerializer):
     class Meta(BaseUserCreateSerializer.Meta):
@@ -29,7 +73,7 @@ class UserCreateSerializer(BaseUserCreateSerializer):
         return super().validate(attrs)
 
 
-class UserSerializer(BaseUserSerializer):
+class UserSerializer(SparseFieldsMixin, BaseUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
 
@@ -46,10 +90,7 @@ class UserSerializer(BaseUserSerializer):
         return False
 
     def get_avatar(self, obj):
-        request = self.context.get('request')
-        if obj.avatar and hasattr(obj.avatar, 'url'):
-            return request.build_absolute_uri(obj.avatar.url) if request else obj.avatar.url
-        return None
+        return media_url(self.context, obj.avatar)
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
@@ -60,10 +101,7 @@ class RecipeShortSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
     def get_image(self, obj):
-        request = self.context.get('request')
-        if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url) if request else obj.image.url
-        return None
+        return media_url(self.context, obj.image)
 
 
 class SubscriptionSerializer(UserSerializer):
@@ -79,6 +117,8 @@ class SubscriptionSerializer(UserSerializer):
         recipes = obj.authored_recipes.all()
         if limit and limit.isdigit():
             recipes = recipes[:int(limit)]
+        if self.fieldset.nested('recipes') is None:
+            return [recipe.id for recipe in recipes]
         return RecipeShortSerializer(recipes, many=True, context=self.context).data
 
     def get_recipes_count(self, obj):
@@ -93,10 +133,7 @@ class AvatarSerializer(serializers.ModelSerializer):
         fields = ('avatar',)
 
     def to_representation(self, instance):
-        request = self.context.get('request')
-        if instance.avatar and hasattr(instance.avatar, 'url'):
-            return {'avatar': request.build_absolute_uri(instance.avatar.url)}
-        return {'avatar': None}
+        return {'avatar': media_url(self.context, instance.avatar)}
 
     def validate_avatar(self, value):
         if not value or not isinstance(value, str):
@@ -128,7 +165,26 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
-class RecipeComponentSerializer(serializers.ModelSerializer):
+class IngredientUsageSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='ingredient_id')
+    name = serializers.CharField(source='ingredient.name')
+    measurement_unit = serializers.CharField(
+        source='ingredient.measurement_unit')
+
+    class Meta:
+        model = IngredientUsage
+        fields = ('id', 'name', 'measurement_unit', 'recipes_total',
+                  'recipes_recent')
+
+
+class PopularIngredientsSerializer(serializers.Serializer):
+    period = serializers.ChoiceField(
+        choices=('recent', 'total'), default='recent')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class RecipeComponentSerializer(SparseFieldsMixin,
+                                serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='ingredient.id')
     name = serializers.ReadOnlyField(source='ingredient.name')
     measurement_unit = serializers.ReadOnlyField(
@@ -148,6 +204,15 @@ class ComponentCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетных операций."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
 
@@ -156,13 +221,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
     def get_image(self, obj):
-        request = self.context.get('request')
-        if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url) if request else obj.image.url
-        return None
+        return media_url(self.context, obj.image)
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     ingredients = RecipeComponentSerializer(
         source='components', many=True, read_only=True)
@@ -175,9 +237,34 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time'
+            'name', 'image', 'text', 'cooking_time',
+            'total_calories', 'total_proteins', 'total_fats',
+            'total_carbohydrates', 'total_price',
         )
 
+    def get_fields(self):
+        """При ?fields= автор и состав — id или урезанные объекты."""
+        fields = super().get_fields()
+        if not self.is_sparse:
+            return fields
+        if 'author' in fields:
+            nested = self.fieldset.nested('author')
+            fields['author'] = (
+                serializers.PrimaryKeyRelatedField(read_only=True)
+                if nested is None
+                else UserSerializer(read_only=True, fieldset=nested))
+        if 'ingredients' in fields:
+            nested = self.fieldset.nested('ingredients')
+            fields['ingredients'] = (
+                serializers.SlugRelatedField(
+                    source='components', slug_field='ingredient_id',
+                    many=True, read_only=True)
+                if nested is None
+                else RecipeComponentSerializer(
+                    source='components', many=True, read_only=True,
+                    fieldset=nested))
+        return fields
+
     def get_is_favorited(self, obj):
         request = self.context.get('request')
         return (request and request.user.is_authenticated
@@ -189,10 +276,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
                 and GroceryList.objects.filter(user=request.user, recipe=obj).exists())
 
     def get_image(self, obj):
-        request = self.context.get('request')
-        if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url) if request else obj.image.url
-        return None
+        return media_url(self.context, obj.image)
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -227,12 +311,19 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             ) for item in ingredients
         ]
         RecipeComponent.objects.bulk_create(components)
+        recompute_totals([recipe.id])
+        events.record_event(
+            RecipeComponent, events.UPDATED, recipe=recipe.id,
+            ingredients=[component.ingredient_id for component in components]
+        )
 
     @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
 
         recipe = Recipe.objects.create(**validated_data)
+        events.record_event(Recipe, events.CREATED,
+                            id=recipe.id, author=recipe.author_id)
 
         self.create_ingredients(recipe, ingredients_data)
 
@@ -251,6 +342,11 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients', None)
+        image = validated_data.get('image')
+        if image is not None and revisions.same_image(instance.image, image):
+            del validated_data['image']
+        before = revisions.snapshot(
+            instance, validated_data, ingredients_data is not None)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -260,7 +356,176 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             self.create_ingredients(instance, ingredients_data)
 
         instance.save()
+        revisions.record_revision(
+            instance, before, self.context['request'].user.id,
+            components=None if ingredients_data is None else {
+                item['id'].id: item['amount'] for item in ingredients_data
+            },
+        )
+        events.record_event(Recipe, events.UPDATED,
+                            id=instance.id, author=instance.author_id,
+                            fields=sorted(validated_data))
         return instance
 
     def to_representation(self, instance):
         return RecipeReadSerializer(instance, context=self.context).data
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ('id', 'name', 'status', 'attempts',
+                  'result', 'created', 'finished')
+
+
+class RecipeImportSerializer(serializers.Serializer):
+    """Источник импорта: JSON-LD (объект, строка или HTML) или строки."""
+    jsonld = serializers.JSONField(required=False)
+    ingredients = serializers.CharField(required=False)
+    name = serializers.CharField(required=False, default='', max_length=256)
+    text = serializers.CharField(required=False, default='')
+    cooking_time = serializers.IntegerField(
+        required=False, allow_null=True, default=None, min_value=1)
+
+    def validate(self, attrs):
+        if not attrs.get('jsonld') and not attrs.get('ingredients'):
+            raise serializers.ValidationError(
+                'Передайте jsonld или строки ингредиентов в ingredients')
+        return attrs
+
+
+class ImportedComponentSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='ingredient_id')
+    name = serializers.CharField()
+    measurement_unit = serializers.CharField()
+    amount = serializers.IntegerField()
+    source = serializers.CharField()
+    match = serializers.CharField()
+    note = serializers.CharField(allow_null=True)
+
+
+class RecipeDraftSerializer(serializers.Serializer):
+    """Черновик рецепта из импорта для проверки перед созданием."""
+    name = serializers.CharField()
+    text = serializers.CharField()
+    cooking_time = serializers.IntegerField(allow_null=True)
+    image = serializers.CharField(allow_null=True)
+    ingredients = serializers.SerializerMethodField()
+    unresolved = serializers.ListField(child=serializers.CharField())
+
+    def get_ingredients(self, obj):
+        return ImportedComponentSerializer(
+            [item for item in obj.components if item.ingredient_id],
+            many=True).data
+
+
+class MealPlanSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MealPlan
+        fields = ('id', 'date', 'slot', 'recipe', 'servings')
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        date = attrs.get('date', getattr(self.instance, 'date', None))
+        slot = attrs.get('slot', getattr(self.instance, 'slot', None))
+        taken = MealPlan.objects.filter(user=user, date=date, slot=slot)
+        if self.instance is not None:
+            taken = taken.exclude(pk=self.instance.pk)
+        if taken.exists():
+            raise serializers.ValidationError(
+                'На этот приём пищи уже запланирован рецепт')
+        return attrs
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['recipe'] = RecipeSerializer(
+            instance.recipe, context=self.context).data
+        return data
+
+
+class MealPlanItemSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    slot = serializers.ChoiceField(choices=MealPlan.SLOTS)
+    recipe = serializers.IntegerField(min_value=1, allow_null=True)
+    servings = serializers.IntegerField(
+        min_value=1, max_value=32767, default=1)
+
+
+class MealPlanBulkSerializer(serializers.Serializer):
+    """Пакет изменений плана; recipe = null освобождает приём пищи."""
+    items = MealPlanItemSerializer(many=True, allow_empty=False,
+                                   max_length=100)
+
+    def validate_items(self, value):
+        slots = [(item['date'], item['slot']) for item in value]
+        if len(slots) != len(set(slots)):
+            raise serializers.ValidationError(
+                'Приёмы пищи не должны повторяться')
+        recipe_ids = {item['recipe'] for item in value if item['recipe']}
+        missing = recipe_ids - set(Recipe.objects.filter(
+            id__in=recipe_ids).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError(
+                f'Рецепты не найдены: {", ".join(map(str, sorted(missing)))}')
+        return value
+
+
+class PlanPeriodSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        if attrs['end'] < attrs['start']:
+            raise serializers.ValidationError(
+                'Конец периода раньше начала')
+        if (attrs['end'] - attrs['start']).days > 62:
+            raise serializers.ValidationError(
+                'Период не должен быть длиннее 62 дней')
+        return attrs
+
+
+class RecipeRevisionSerializer(serializers.ModelSerializer):
+    """Ревизия с названиями ингредиентов из context['ingredients']."""
+    changes = serializers.SerializerMethodField()
+    ingredients = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RecipeRevision
+        fields = ('id', 'created', 'editor', 'edits', 'changes',
+                  'ingredients')
+
+    def get_changes(self, obj):
+        return {
+            field: {'old': old, 'new': new}
+            for field, (old, new) in obj.changes.get('fields', {}).items()
+        }
+
+    def get_ingredients(self, obj):
+        ingredients = self.context.get('ingredients', {})
+        return [
+            {
+                'id': int(pk),
+                'name': ingredients.get(int(pk), ('', ''))[0],
+                'measurement_unit': ingredients.get(int(pk), ('', ''))[1],
+                'old_amount': old,
+                'new_amount': new,
+            }
+            for pk, (old, new) in obj.changes.get('components', {}).items()
+        ]
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    recipe = RecipeSerializer(read_only=True)
+    author = serializers.CharField(source='recipe.author.username')
+
+    class Meta:
+        model = Notification
+        fields = ('id', 'recipe', 'author', 'count', 'is_digest', 'is_read',
+                  'created')
+
+
+class NotificationInboxSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NotificationInbox
+        fields = ('unread', 'digest_mode')
+        read_only_fields = ('unread',)
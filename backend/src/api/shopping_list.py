@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from django.db.models import Sum
+
+from recipes import quantities
+from recipes.models import Recipe, RecipeComponent
+from recipes.quantities import format_amount
+
+
+def build_shopping_list(user):
+    """Текст списка покупок пользователя."""
+    ingredients = RecipeComponent.objects.filter(
+        recipe__in_grocery_lists__user=user, recipe__deleted_at__isnull=True
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    ).annotate(amount=Sum('amount')).order_by()
+    products = quantities.aggregate(ingredients)
+
+    recipes = Recipe.objects.filter(
+        in_grocery_lists__user=user
+    ).select_related('author')
+
+    current_date = datetime.now().strftime('%d.%m.%Y')
+    # Цена неизвестна, если не у всех ингредиентов рецепта она задана.
+    prices = [recipe.total_price for recipe in recipes
+              if recipe.total_price is not None]
+    cost = f'Примерная стоимость: {format_amount(sum(prices))} ₽'
+    unknown = len(recipes) - len(prices)
+    if unknown:
+        cost += f' (без рецептов с неизвестной ценой: {unknown})'
+
+    return '\n'.join([
+        f'Список покупок от {current_date}',
+        '',
+        'Продукты:',
+        *[f'{i}. {item.name.capitalize()} '
+          f'({item.unit}) — {format_amount(item.amount)}'
+          for i, item in enumerate(products, 1)],
+        '',
+        'Рецепты:',
+        *[f'• {recipe.name} '
+          f'(автор: {recipe.author.get_full_name() or recipe.author.username})'
+          for recipe in recipes],
+        *(['', cost] if prices else []),
+    ])
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.softdelete import soft_deleted
+from recipes.models import Ingredient, MealPlan, Recipe
+from users.models import Subscription
+from .authentication import invalidate_token, invalidate_user_tokens
+from .meal_plans import bump_plan_versions
+from .precompressed import bump_catalogue_version
+from .profiles import invalidate_author_profiles
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_user_tokens(instance)
+        invalidate_author_profiles(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    if user is not None and user.pk:
+        invalidate_user_tokens(user)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, created=True, **kwargs):
+    # Правка рецепта не меняет ни счётчики, ни состав первой страницы.
+    if created:
+        invalidate_author_profiles(instance.author_id)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def subscription_changed(sender, instance, **kwargs):
+    invalidate_author_profiles(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    bump_catalogue_version('ingredients')
+
+
+@receiver(post_save, sender=MealPlan)
+@receiver(post_delete, sender=MealPlan)
+def meal_plan_changed(sender, instance, **kwargs):
+    bump_plan_versions(instance.user_id)
+
+
+@receiver(soft_deleted, sender=get_user_model())
+def user_soft_deleted(sender, pks, **kwargs):
+    for token in Token.objects.filter(user_id__in=pks):
+        token.delete()
+    # Счётчики подписок видны и в профилях второй стороны.
+    related = Subscription.objects.filter(
+        Q(user_id__in=pks) | Q(author_id__in=pks)
+    ).values_list('user_id', 'author_id')
+    invalidate_author_profiles(*pks, *{pk for pair in related for pk in pair})
+
+
+@receiver(soft_deleted, sender=Recipe)
+def recipe_soft_deleted(sender, pks, **kwargs):
+    invalidate_author_profiles(*Recipe.all_objects.filter(
+        pk__in=pks).values_list('author_id', flat=True).distinct())
+    bump_plan_versions(*MealPlan.objects.filter(
+        recipe_id__in=pks).values_list('user_id', flat=True).distinct())
@@ -0,0 +1,19 @@
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from core.jobs import task
+from users.models import User
+from .shopping_list import build_shopping_list
+
+
+@task('shopping_list')
+def shopping_list_file(payload):
+    """Сохраняет список покупок в хранилище и возвращает ссылку."""
+    user = User.objects.get(id=payload['user'])
+    name = default_storage.save(
+        f'shopping_lists/{user.id}_{uuid.uuid4().hex}.txt',
+        ContentFile(build_shopping_list(user).encode('utf-8'))
+    )
+    return {'url': default_storage.url(name)}
@@ -0,0 +1,191 @@
+"""Проверки быстрого пути чтения рецептов (api.fast_serializers).
+
+Вывод FastRecipeReadSerializer + FastJSONRenderer сравнивается побайтно
+с RecipeReadSerializer + JSONRenderer из DRF: для полного ответа,
+разреженного набора полей и анонимного запроса. Замер скорости
+запускается только с переменной окружения BENCHMARK=1.
+"""
+import base64
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from recipes.models import (GroceryList, Ingredient, Recipe, RecipeComponent,
+                            UserFavorite)
+from users.models import Subscription, User
+from .authentication import CachedTokenAuthentication, shared_key
+from .fast_serializers import FastRecipeReadSerializer
+from .fieldsets import Fieldset
+from .renderers import FastJSONRenderer
+from .serializers import RecipeReadSerializer
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA'
+    '60e6kgAAAABJRU5ErkJggg=='
+)
+
+
+class FastRecipeReadSerializerTest(TestCase):
+    RECIPES = 100
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(
+            MEDIA_ROOT=cls.media_root, ALLOWED_HOSTS=['testserver'])
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user(
+            email='viewer@example.com', username='viewer',
+            first_name='Зритель', last_name='Тестов', password='pass12345!')
+        authors = [
+            User.objects.create_user(
+                email=f'author{number}@example.com',
+                username=f'author{number}', first_name='Автор',
+                last_name=f'№{number}', password='pass12345!')
+            for number in range(3)
+        ]
+        authors[0].avatar.save('avatar.png', ContentFile(PNG))
+        Subscription.objects.create(user=cls.viewer, author=authors[0])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ингредиент «{number}»', measurement_unit='г')
+            for number in range(10)
+        ])
+        image = ContentFile(PNG, name='recipe.png')
+        recipes = []
+        for number in range(cls.RECIPES):
+            recipe = Recipe(
+                author=authors[number % len(authors)],
+                name=f'Рецепт {number} "в кавычках"',
+                text='Строка\nс переводом\u2028и разделителями\u2029абзацев',
+                cooking_time=number + 1,
+                total_calories=number * 12.5 if number % 2 else None,
+                total_price=Decimal(number) / 4 if number % 2 else None,
+            )
+            recipe.image.save('recipe.png', image, save=False)
+            recipes.append(recipe)
+        cls.recipes = Recipe.objects.bulk_create(recipes)
+        RecipeComponent.objects.bulk_create([
+            RecipeComponent(recipe=recipe, ingredient=ingredient,
+                            amount=(index + 1) * 10)
+            for number, recipe in enumerate(cls.recipes)
+            for index, ingredient in enumerate(
+                ingredients[number % 7:number % 7 + 3])
+        ])
+        UserFavorite.objects.create(user=cls.viewer, recipe=cls.recipes[0])
+        GroceryList.objects.create(user=cls.viewer, recipe=cls.recipes[1])
+        cls.recipe_ids = [recipe.id for recipe in cls.recipes]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def make_request(self, user, params=None):
+        request = Request(APIRequestFactory().get('/api/recipes/', params))
+        request.user = user
+        return request
+
+    def render_slow(self, request):
+        recipes = Recipe.objects.filter(
+            pk__in=self.recipe_ids
+        ).prefetch_related('components__ingredient').select_related(
+            'author').order_by('id')
+        return JSONRenderer().render(RecipeReadSerializer(
+            recipes, many=True, context={'request': request}).data)
+
+    def render_fast(self, request):
+        return FastJSONRenderer().render(FastRecipeReadSerializer(
+            request, Fieldset.from_request(request)
+        ).serialize(self.recipe_ids))
+
+    def assertSameOutput(self, request):
+        self.assertEqual(self.render_fast(request), self.render_slow(request))
+
+    def test_full(self):
+        self.assertSameOutput(self.make_request(self.viewer))
+
+    def test_anonymous(self):
+        self.assertSameOutput(self.make_request(AnonymousUser()))
+
+    def test_sparse(self):
+        for fields, expand in (
+            ('id,name,cooking_time', ''),
+            ('id,author,ingredients,is_favorited', ''),
+            ('id,author,ingredients', 'author,ingredients'),
+            ('name,author.username,author.is_subscribed,ingredients.amount',
+             ''),
+            ('image,is_in_shopping_cart,author.avatar', ''),
+            ('id,total_calories,total_price', ''),
+        ):
+            with self.subTest(fields=fields, expand=expand):
+                params = {'fields': fields, 'expand': expand}
+                self.assertSameOutput(self.make_request(self.viewer, params))
+                self.assertSameOutput(
+                    self.make_request(AnonymousUser(), params))
+
+    def test_keeps_requested_order(self):
+        recipe_ids = self.recipe_ids[::-1][:5] + [0]
+        data = FastRecipeReadSerializer(
+            self.make_request(self.viewer)).serialize(recipe_ids)
+        self.assertEqual([item['id'] for item in data], recipe_ids[:5])
+
+    @skipUnless(os.getenv('BENCHMARK'), 'замер скорости: BENCHMARK=1')
+    def test_faster_on_full_page(self):
+        """Страница из 100 рецептов собирается минимум в 5 раз быстрее."""
+        request = self.make_request(self.viewer)
+
+        def median(func, repeat=5):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                func(request)
+                timings.append(time.perf_counter() - started)
+            return sorted(timings)[repeat // 2]
+
+        slow = median(self.render_slow)
+        fast = median(self.render_fast)
+        self.assertGreaterEqual(slow / fast, 5, f'{slow=:.4f} {fast=:.4f}')
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Изменение пользователя сразу видно при следующей проверке токена."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com', username='user', first_name='Имя',
+            last_name='Фамилия', password='pass12345!')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+        user, _token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_deactivated_in_other_process(self):
+        # Другой процесс сохраняет пользователя: его сигнал сбрасывает
+        # только общий кеш, до памяти этого процесса он не дотягивается.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.delete(shared_key(self.token.key))
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deleted_token_rejected(self):
+        Token.objects.filter(pk=self.token.pk).delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
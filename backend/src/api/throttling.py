@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'60/min' -> (ёмкость 60, пополнение 1 токен в секунду)."""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение частоты запросов по алгоритму token bucket.
+
+    Корзины хранятся в памяти процесса (не больше MAX_BUCKETS, вытесняются
+    давно не использованные). При THROTTLE_USE_SHARED_CACHE состояние
+    корзины хранится в кеше Django и общее для всех воркеров; чтение и
+    запись корзины выполняются под блокировкой на cache.add, иначе
+    параллельные запросы списывали бы один и тот же токен.
+    Ключ — пользователь, а для анонимов — IP-адрес (get_ident с учётом
+    NUM_PROXIES).
+    """
+    MAX_BUCKETS = 10000
+    # Сколько ждать блокировку корзины и через сколько она снимается сама,
+    # если процесс упал, не успев её освободить (сек.).
+    LOCK_WAIT = 0.2
+    LOCK_TIMEOUT = 2
+    buckets = OrderedDict()
+    lock = threading.Lock()
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.capacity, self.refill = parse_rate(
+            api_settings.DEFAULT_THROTTLE_RATES[scope])
+        self.wait_time = None
+
+    def get_key(self, request):
+        user = request.user
+        if user and user.is_authenticated:
+            return f'throttle:{self.scope}:user:{user.pk}'
+        return f'throttle:{self.scope}:ip:{self.get_ident(request)}'
+
+    def take(self, state, now):
+        """Списывает токен; возвращает новое состояние и успех."""
+        tokens, updated = state or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill)
+        if tokens >= 1:
+            return (tokens - 1, now), True
+        self.wait_time = (1 - tokens) / self.refill
+        return (tokens, now), False
+
+    def allow_shared(self, key):
+        lock = f'{key}:lock'
+        deadline = time.monotonic() + self.LOCK_WAIT
+        while not cache.add(lock, 1, timeout=self.LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                # Корзину держат параллельные запросы того же клиента.
+                self.wait_time = 1 / self.refill
+                return False
+            time.sleep(0.005)
+        try:
+            state, allowed = self.take(cache.get(key), time.time())
+            cache.set(key, state, timeout=int(self.capacity / self.refill) + 1)
+        finally:
+            cache.delete(lock)
+        return allowed
+
+    def allow_request(self, request, view):
+        key = self.get_key(request)
+        if getattr(settings, 'THROTTLE_USE_SHARED_CACHE', False):
+            return self.allow_shared(key)
+
+        now = time.monotonic()
+        buckets = self.buckets
+        with self.lock:
+            state, allowed = self.take(buckets.pop(key, None), now)
+            buckets[key] = state
+            if len(buckets) > self.MAX_BUCKETS:
+                buckets.popitem(last=False)
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class ThrottleScopesMixin:
+    """Подключает TokenBucketThrottle по словарю действие -> области."""
+    throttle_scopes = {}
+
+    def get_throttles(self):
+        return super().get_throttles() + [
+            TokenBucketThrottle(scope)
+            for scope in self.throttle_scopes.get(self.action, ())
+        ]
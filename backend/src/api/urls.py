@@ -2,14 +2,18 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    UserViewSet, IngredientViewSet, RecipeViewSet,
-    recipe_redirect
+    UserViewSet, IngredientViewSet, RecipeViewSet, JobViewSet,
+    MealPlanViewSet, NotificationViewSet, recipe_redirect
 )
 
 router = DefaultRouter()
 router.register('users', UserViewSet, basename='users')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
+router.register('jobs', JobViewSet, basename='jobs')
+router.register('meal-plans', MealPlanViewSet, basename='meal-plans')
+router.register('notifications', NotificationViewSet,
+                basename='notifications')
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
@@ -1,7 +1,11 @@
-from django.db.models import Sum
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils import timezone
 from django.shortcuts import redirect
 from django.http import Http404
 from rest_framework import viewsets, status
@@ -10,23 +14,46 @@ from rest_framework.permissions import IsAuthenticated, SAFE_METHODS, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
-from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
 
-from recipes.models import (Recipe, Ingredient,
-                            RecipeComponent, UserFavorite,
-                            GroceryList)
+from core import events, jobs
+from core.models import Job
+from core.toggles import LinkTable
+from recipes.importers import (
+    IngredientIndex, draft_from_jsonld, draft_from_lines, load_jsonld
+)
+from recipes import notifications
+from recipes.recommendations import INTERACTION_MODELS, MAX_ITEMS_PER_USER
+from recipes.models import (Recipe, Ingredient, IngredientUsage, MealPlan,
+                            Notification, NotificationInbox, RecipeRevision,
+                            UserFavorite, GroceryList, RecipeSimilarity)
 from users.models import User, Subscription
 from .serializers import (
     UserSerializer, SubscriptionSerializer, AvatarSerializer,
-    IngredientSerializer,
+    IngredientSerializer, IngredientUsageSerializer,
+    PopularIngredientsSerializer,
 
     RecipeReadSerializer, RecipeCreateSerializer,
-    RecipeSerializer
+    RecipeSerializer, RecipeIdsSerializer, JobSerializer,
+    RecipeImportSerializer, RecipeDraftSerializer,
+    MealPlanSerializer, MealPlanBulkSerializer, PlanPeriodSerializer,
+    RecipeRevisionSerializer, NotificationSerializer,
+    NotificationInboxSerializer
+)
+from .permissions import IsAuthorOrReadOnly, IsAuthorOrStaff
+from .pagination import (
+    CustomPagination, NotificationPagination, RevisionPagination
 )
-from .permissions import IsAuthorOrReadOnly
-from .pagination import CustomPagination
+from .precompressed import catalogue_version, precompressed_response
+from .fast_serializers import FastRecipeReadSerializer
+from .fieldsets import Fieldset
+from .media import MediaURLBuilder
+from .meal_plans import bump_plan_versions, get_plan_shopping_list
+from .profiles import CARD_FIELDS, get_author_profile
 from .filters import IngredientFilter, RecipeFilter
+from .shopping_list import build_shopping_list
+from .throttling import ThrottleScopesMixin
 
 
 def recipe_redirect(request, pk):
@@ -38,25 +65,71 @@ def recipe_redirect(request, pk):
         raise Http404("Рецепт не найден")
 
 
-class UserViewSet(DjoserUserViewSet):
+@lru_cache(maxsize=1)
+def ingredient_index(version):
+    """Индекс каталога ингредиентов в памяти процесса на версию каталога.
+
+    Версия берётся из общего кеша, поэтому загрузка ингредиентов в любом
+    процессе приводит к перестройке индекса при следующем запросе.
+    """
+    return IngredientIndex.from_catalogue()
+
+
+def job_accepted(request, job):
+    """Ответ 202 со ссылкой на статус фоновой задачи."""
+    return Response(
+        {
+            'id': job.id,
+            'status': job.status,
+            'url': request.build_absolute_uri(
+                reverse('jobs-detail', args=[job.id])),
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
+class UserViewSet(ThrottleScopesMixin, DjoserUserViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = CustomPagination
+    throttle_scopes = {
+        'create': ('writes',),
+        'set_password': ('writes',),
+        'subscribe': ('toggles',),
+        'avatar': ('uploads',),
+    }
+    sparse_columns = ('email', 'username', 'first_name', 'last_name', 'avatar')
+
+    def prune_queryset(self, queryset):
+        """Читает из базы только поля, запрошенные через ?fields=."""
+        fieldset = Fieldset.from_request(self.request)
+        if not fieldset.is_sparse:
+            return queryset
+        return queryset.only('id', *fieldset.select(self.sparse_columns))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = self.prune_queryset(queryset)
+        return queryset
 
     @action(detail=True, methods=['post', 'delete'], permission_classes=[IsAuthenticated])
     def subscribe(self, request, id=None):
-        author = self.get_object()
+        if not str(id).isdigit():
+            raise Http404('Пользователь не найден')
         user = request.user
+        subscriptions = LinkTable(Subscription, 'author')
+        payload = {'user': user.id, 'author': int(id)}
         if request.method == 'POST':
-            if user == author:
+            if user.id == int(id):
                 return Response(
                     {'errors': 'Нельзя подписаться на самого себя'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            subscription, created = Subscription.objects.get_or_create(
-                user=user, author=author
-            )
+            author, created = subscriptions.add(user.id, id, payload)
+            if author is None:
+                raise Http404('Пользователь не найден')
             if not created:
                 return Response(
                     {'errors': f'Вы уже подписаны на пользователя {author.username}'},
@@ -67,10 +140,13 @@ class UserViewSet(DjoserUserViewSet):
                 author, context={'request': request}).data
             return Response(data, status=status.HTTP_201_CREATED)
 
-        if Subscription.objects.filter(user=user, author=author).exists():
-            Subscription.objects.filter(user=user, author=author).delete()
+        exists, deleted = subscriptions.remove(user.id, id, payload)
+        if not exists:
+            raise Http404('Пользователь не найден')
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+        author = User.objects.only('username').get(id=id)
         return Response(
             {'errors': f'Вы не подписаны на пользователя {author.username}'},
             status=status.HTTP_400_BAD_REQUEST
@@ -79,9 +155,11 @@ class UserViewSet(DjoserUserViewSet):
     @action(detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         user = request.user
-        subscriptions = User.objects.filter(
-            subscribers__user=user
-        ).prefetch_related('authored_recipes', 'subscribers')
+        fieldset = Fieldset.from_request(request)
+        subscriptions = self.prune_queryset(
+            User.objects.filter(subscribers__user=user))
+        if 'recipes' in fieldset or 'recipes_count' in fieldset:
+            subscriptions = subscriptions.prefetch_related('authored_recipes')
 
         page = self.paginate_queryset(subscriptions)
         serializer = SubscriptionSerializer(
@@ -89,6 +167,25 @@ class UserViewSet(DjoserUserViewSet):
         )
         return self.get_paginated_response(serializer.data)
 
+    @action(detail=True, permission_classes=[AllowAny])
+    def profile(self, request, id=None):
+        """Карточка автора, счётчики и первая страница его рецептов."""
+        profile = str(id).isdigit() and get_author_profile(int(id))
+        if not profile:
+            raise Http404('Пользователь не найден')
+        user = request.user
+        data = {field: profile[field] for field in CARD_FIELDS}
+        data['is_subscribed'] = user.is_authenticated and (
+            Subscription.objects.filter(user=user, author_id=id).exists())
+        data['avatar'] = MediaURLBuilder.for_request(request).url(
+            profile['avatar'])
+        data['recipes_count'] = profile['recipes_count']
+        data['subscribers_count'] = profile['subscribers_count']
+        data['subscriptions_count'] = profile['subscriptions_count']
+        data['recipes'] = FastRecipeReadSerializer(request).serialize(
+            profile['recipe_ids'])
+        return Response(data)
+
     @action(methods=['put', 'delete'], detail=False, url_path='me/avatar',
             permission_classes=[IsAuthenticated])
     def avatar(self, request):
@@ -117,22 +214,65 @@ class UserViewSet(DjoserUserViewSet):
         return super().get_permissions()
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ThrottleScopesMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     permission_classes = (AllowAny,)
     pagination_class = None
+    throttle_scopes = {
+        'list': ('autocomplete',),
+        'popular': ('autocomplete',),
+    }
 
-
-class RecipeViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.query_params.get('name'):
+            # В подсказках часто используемые ингредиенты идут первыми.
+            queryset = queryset.order_by(
+                F('usage__recipes_total').desc(nulls_last=True), 'name')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+        return precompressed_response(
+            self, 'ingredients',
+            lambda: self.get_serializer(self.get_queryset(), many=True).data)
+
+    @action(detail=False)
+    def popular(self, request):
+        """Самые используемые ингредиенты: за последние дни или всего."""
+        serializer = PopularIngredientsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        field = f'recipes_{serializer.validated_data["period"]}'
+        usage = IngredientUsage.objects.filter(
+            **{f'{field}__gt': 0}
+        ).select_related('ingredient').order_by(
+            f'-{field}', 'ingredient_id'
+        )[:serializer.validated_data['limit']]
+        return Response(IngredientUsageSerializer(usage, many=True).data)
+
+
+class RecipeViewSet(ThrottleScopesMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = CustomPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     http_method_names = ['get', 'post', 'patch', 'delete']
+    throttle_scopes = {
+        'create': ('writes', 'uploads'),
+        'partial_update': ('writes', 'uploads'),
+        'destroy': ('writes',),
+        'favorite': ('toggles',),
+        'shopping_cart': ('toggles',),
+        'bulk_favorite': ('toggles',),
+        'bulk_shopping_cart': ('toggles',),
+        'clear_shopping_cart': ('toggles',),
+        'import_recipes': ('writes',),
+    }
 
     def get_queryset(self):
         return Recipe.objects.all().prefetch_related(
@@ -144,18 +284,47 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeReadSerializer
         return RecipeCreateSerializer
 
+    def list(self, request, *args, **kwargs):
+        recipe_ids = self.filter_queryset(
+            Recipe.objects.values_list('pk', flat=True))
+        page = self.paginate_queryset(recipe_ids)
+        data = FastRecipeReadSerializer(
+            request, Fieldset.from_request(request)
+        ).serialize(list(recipe_ids if page is None else page))
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.kwargs['pk']
+        data = pk.isdigit() and FastRecipeReadSerializer(
+            request, Fieldset.from_request(request)).serialize([int(pk)])
+        if not data:
+            raise Http404('Рецепт не найден')
+        return Response(data[0])
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        events.record_event(Recipe, events.DELETED,
+                            id=instance.id, author=instance.author_id)
+        instance.delete()
+
     def handle_favorite_or_shopping_cart(self, request, pk, model_class):
+        """Переключает связь одним запросом к базе, без гонок при повторах."""
+        if not str(pk).isdigit():
+            raise Http404('Рецепт не найден')
         user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
+        links = LinkTable(model_class, 'recipe')
+        payload = {'user': user.id, 'recipe': int(pk)}
         verbose = model_class._meta.verbose_name
 
         if request.method == 'POST':
-            obj, created = model_class.objects.get_or_create(
-                user=user, recipe=recipe
-            )
+            recipe, created = links.add(user.id, pk, payload)
+            if recipe is None:
+                raise Http404('Рецепт не найден')
             if not created:
                 return Response(
                     {'errors': f'Рецепт «{recipe.name}» уже в {verbose}!'},
@@ -164,9 +333,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
             data = RecipeSerializer(recipe, context={'request': request}).data
             return Response(data, status=status.HTTP_201_CREATED)
 
-        qs = model_class.objects.filter(user=user, recipe=recipe)
-        if qs.exists():
-            qs.delete()
+        exists, deleted = links.remove(user.id, pk, payload)
+        if not exists:
+            raise Http404('Рецепт не найден')
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(
@@ -174,6 +344,45 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    def handle_bulk_favorite_or_shopping_cart(self, request, model_class):
+        """Добавляет или удаляет пачку рецептов за постоянное число запросов.
+
+        События пишутся только для связей, которые действительно
+        изменились в этом запросе.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        user = request.user
+        links = LinkTable(model_class, 'recipe')
+
+        with transaction.atomic():
+            existing = set(Recipe.objects.filter(
+                id__in=recipe_ids).values_list('id', flat=True))
+            found = [pk for pk in recipe_ids if pk in existing]
+            if request.method == 'POST':
+                changed = links.add_many(user.id, found)
+                action = events.CREATED
+                done, skipped = 'added', 'already_added'
+            else:
+                changed = links.remove_many(user.id, found)
+                action = events.DELETED
+                done, skipped = 'removed', 'not_added'
+            events.record_events(
+                model_class, action,
+                [{'user': user.id, 'recipe': pk} for pk in changed]
+            )
+
+        changed = set(changed)
+        results = [
+            {'id': pk,
+             'status': done if pk in changed
+             else skipped if pk in existing
+             else 'not_found'}
+            for pk in recipe_ids
+        ]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
     @action(detail=True,
             methods=['post', 'delete'],
             permission_classes=[IsAuthenticated])
@@ -186,45 +395,149 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def shopping_cart(self, request, pk=None):
         return self.handle_favorite_or_shopping_cart(request, pk, GroceryList)
 
+    @action(detail=False, methods=['post'],
+            permission_classes=[IsAuthenticated], url_path='import')
+    def import_recipes(self, request):
+        """Разбирает внешний рецепт в черновики, ничего не сохраняя."""
+        serializer = RecipeImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        index = ingredient_index(catalogue_version('ingredients'))
+        if data.get('jsonld'):
+            drafts = [draft_from_jsonld(recipe, index)
+                      for recipe in load_jsonld(data['jsonld'])]
+            if not drafts:
+                return Response(
+                    {'errors': 'В JSON-LD не найден рецепт schema.org'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            drafts = [draft_from_lines(
+                data['ingredients'].splitlines(), index,
+                name=data['name'], text=data['text'],
+                cooking_time=data['cooking_time'],
+            )]
+        return Response(
+            {'recipes': RecipeDraftSerializer(drafts, many=True).data})
+
+    @action(detail=False,
+            methods=['post', 'delete'],
+            permission_classes=[IsAuthenticated],
+            url_path='favorite/bulk')
+    def bulk_favorite(self, request):
+        return self.handle_bulk_favorite_or_shopping_cart(
+            request, UserFavorite)
+
+    @action(detail=False,
+            methods=['post', 'delete'],
+            permission_classes=[IsAuthenticated],
+            url_path='shopping_cart/bulk')
+    def bulk_shopping_cart(self, request):
+        return self.handle_bulk_favorite_or_shopping_cart(
+            request, GroceryList)
+
+    @action(detail=False,
+            methods=['delete'],
+            permission_classes=[IsAuthenticated],
+            url_path='shopping_cart')
+    @transaction.atomic
+    def clear_shopping_cart(self, request):
+        user = request.user
+        grocery_list = GroceryList.objects.filter(user=user)
+        events.record_events(
+            GroceryList, events.DELETED,
+            [{'user': user.id, 'recipe': pk}
+             for pk in grocery_list.values_list('recipe_id', flat=True)]
+        )
+        grocery_list.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False,
             permission_classes=[IsAuthenticated],
             url_path='download_shopping_cart')
     def download_shopping_cart(self, request):
         user = request.user
 
-        ingredients = RecipeComponent.objects.filter(
-            recipe__in_grocery_lists__user=user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount')).order_by('ingredient__name')
-
-        recipes = Recipe.objects.filter(
-            in_grocery_lists__user=user
-        ).select_related('author')
-
-        current_date = datetime.now().strftime('%d.%m.%Y')
-
-        shopping_list = '\n'.join([
-            f'Список покупок от {current_date}',
-            '',
-            'Продукты:',
-            *[f'{i}. {item["ingredient__name"].capitalize()} '
-              f'({item["ingredient__measurement_unit"]}) — {item["amount"]}'
-              for i, item in enumerate(ingredients, 1)],
-            '',
-            'Рецепты:',
-            *[f'• {recipe.name} (автор: {recipe.author.get_full_name() or recipe.author.username})'
-              for recipe in recipes],
-        ])
+        if request.query_params.get('async') in ('1', 'true'):
+            job = jobs.enqueue('shopping_list', {'user': user.id},
+                               priority=1, user=user,
+                               dedup_key=f'shopping_list:{user.id}')
+            return job_accepted(request, job)
 
         response = FileResponse(
-            BytesIO(shopping_list.encode('utf-8')),
+            BytesIO(build_shopping_list(user).encode('utf-8')),
             content_type='text/plain',
             filename='shopping_cart.txt'
         )
         return response
 
+    def get_limit(self, default=10):
+        limit = self.request.query_params.get('limit', '')
+        return min(int(limit), 100) if limit.isdigit() else default
+
+    @action(detail=True, permission_classes=[AllowAny])
+    def similar(self, request, pk=None):
+        recipe = self.get_object()
+        similar = RecipeSimilarity.objects.filter(
+            recipe=recipe, similar__deleted_at__isnull=True,
+        ).select_related('similar').order_by('-score')[:self.get_limit()]
+        return Response(
+            RecipeSerializer([item.similar for item in similar], many=True,
+                             context={'request': request}).data)
+
+    @action(detail=False, permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        """Рецепты, похожие на избранное и список покупок пользователя.
+
+        Сначала читаются id последних MAX_ITEMS_PER_USER рецептов из
+        каждой таблицы, затем по ним — сходство через индекс
+        (recipe, -score), без подзапросов на каждую строку сходства.
+        """
+        user = request.user
+        seen = set()
+        for model in INTERACTION_MODELS:
+            seen.update(model.objects.filter(user=user).order_by(
+                '-added_at').values_list(
+                'recipe_id', flat=True)[:MAX_ITEMS_PER_USER])
+        if not seen:
+            return Response([])
+
+        scores = RecipeSimilarity.objects.filter(
+            recipe_id__in=seen, similar__deleted_at__isnull=True,
+        ).exclude(
+            similar_id__in=seen
+        ).values('similar_id').annotate(
+            total=Sum('score')
+        ).order_by('-total').values_list(
+            'similar_id', flat=True)[:self.get_limit()]
+        recipe_ids = list(scores)
+        recipes = Recipe.objects.in_bulk(recipe_ids)
+        return Response(RecipeSerializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes],
+            many=True, context={'request': request}
+        ).data)
+
+    @action(detail=True,
+            permission_classes=[IsAuthenticated, IsAuthorOrStaff])
+    def revisions(self, request, pk=None):
+        """История правок рецепта, новые первыми."""
+        recipe = get_object_or_404(Recipe.objects.only('author_id'), id=pk)
+        self.check_object_permissions(request, recipe)
+        paginator = RevisionPagination()
+        page = paginator.paginate_queryset(
+            RecipeRevision.objects.filter(recipe=recipe), request, view=self)
+        ingredient_ids = {
+            int(ingredient_id) for revision in page
+            for ingredient_id in revision.changes.get('components', {})
+        }
+        ingredients = {
+            row[0]: row[1:] for row in Ingredient.objects.filter(
+                id__in=ingredient_ids).values_list(
+                'id', 'name', 'measurement_unit')
+        } if ingredient_ids else {}
+        return paginator.get_paginated_response(RecipeRevisionSerializer(
+            page, many=True, context={'ingredients': ingredients}).data)
+
     @action(detail=True,
             methods=['get'],
             url_path='get-link')
@@ -236,3 +549,129 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         return Response({'short-link': short_url})
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+
+class MealPlanViewSet(ThrottleScopesMixin, viewsets.ModelViewSet):
+    serializer_class = MealPlanSerializer
+    permission_classes = (IsAuthenticated,)
+    http_method_names = ['get', 'post', 'patch', 'delete']
+    throttle_scopes = {
+        'create': ('writes',),
+        'partial_update': ('writes',),
+        'destroy': ('writes',),
+        'bulk': ('writes',),
+    }
+
+    def get_period(self):
+        """Период из ?start=&end=, по умолчанию текущая неделя."""
+        today = timezone.localdate()
+        start = today - timedelta(days=today.weekday())
+        serializer = PlanPeriodSerializer(data={
+            'start': self.request.query_params.get('start', start),
+            'end': self.request.query_params.get(
+                'end', start + timedelta(days=6)),
+        })
+        serializer.is_valid(raise_exception=True)
+        return (serializer.validated_data['start'],
+                serializer.validated_data['end'])
+
+    def get_queryset(self):
+        queryset = MealPlan.objects.filter(
+            user=self.request.user, recipe__deleted_at__isnull=True,
+        ).select_related('recipe')
+        if self.action == 'list':
+            queryset = queryset.filter(date__range=self.get_period())
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Заполняет и освобождает приёмы пищи одним запросом."""
+        serializer = MealPlanBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
+        user = request.user
+        with transaction.atomic():
+            cleared = [item for item in items if item['recipe'] is None]
+            if cleared:
+                q = Q()
+                for item in cleared:
+                    q |= Q(date=item['date'], slot=item['slot'])
+                MealPlan.objects.filter(q, user=user).delete()
+            MealPlan.objects.bulk_create(
+                [
+                    MealPlan(user=user, date=item['date'], slot=item['slot'],
+                             recipe_id=item['recipe'],
+                             servings=item['servings'])
+                    for item in items if item['recipe'] is not None
+                ],
+                update_conflicts=True,
+                unique_fields=['user', 'date', 'slot'],
+                update_fields=['recipe', 'servings'],
+            )
+        # bulk_create не шлёт сигналы.
+        bump_plan_versions(user.id)
+        dates = [item['date'] for item in items]
+        plans = self.get_queryset().filter(
+            date__range=(min(dates), max(dates)))
+        return Response(self.get_serializer(plans, many=True).data)
+
+    @action(detail=False)
+    def shopping_list(self, request):
+        start, end = self.get_period()
+        return Response({
+            'start': start,
+            'end': end,
+            'ingredients': get_plan_shopping_list(request.user.id, start, end),
+        })
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = NotificationSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(
+            user=self.request.user, recipe__deleted_at__isnull=True,
+        ).select_related('recipe__author')
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    @action(detail=False)
+    def unread_count(self, request):
+        """Счётчик из NotificationInbox: один запрос по ключу."""
+        unread = NotificationInbox.objects.filter(
+            user=request.user).values_list('unread', flat=True).first()
+        return Response({'unread': unread or 0})
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        notifications.mark_read(request.user.id, [self.get_object().id])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['post'])
+    def read_all(self, request):
+        notifications.mark_read(request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['get', 'patch'], url_path='settings')
+    def inbox(self, request):
+        inbox, _ = NotificationInbox.objects.get_or_create(user=request.user)
+        if request.method == 'PATCH':
+            serializer = NotificationInboxSerializer(
+                inbox, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(NotificationInboxSerializer(inbox).data)
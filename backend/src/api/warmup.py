@@ -0,0 +1,79 @@
+"""Прогрев процесса перед первым запросом.
+
+Вызывается из gunicorn.conf.py после загрузки приложения в воркере:
+компилирует URL-резолвер, загружает ленивые классы djoser, строит поля
+сериализаторов и формы фильтров, индекс ингредиентов для импорта и
+сжатые тела справочника ингредиентов. Тела попадают в общий кеш
+(settings.CACHES), поэтому каждую версию справочника сжимает только
+первый прогретый воркер; ограничения частоты при прогреве не действуют.
+"""
+import time
+
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import get_resolver
+from djoser.conf import settings as djoser_settings
+
+from core import compression
+from recipes.models import Ingredient, Recipe
+from . import serializers
+from .filters import IngredientFilter, RecipeFilter
+from .precompressed import catalogue_version
+
+SERIALIZERS = (
+    serializers.UserSerializer,
+    serializers.SubscriptionSerializer,
+    serializers.IngredientSerializer,
+    serializers.RecipeSerializer,
+    serializers.RecipeReadSerializer,
+    serializers.RecipeCreateSerializer,
+    serializers.MealPlanSerializer,
+)
+PATHS = ('/api/recipes/', '/api/users/', '/api/ingredients/',
+         '/api/meal-plans/')
+
+
+def warm_urls():
+    resolver = get_resolver()
+    for path in PATHS:
+        resolver.resolve(path)
+    # Обратный словарь строится отдельно от прямого разбора.
+    resolver.reverse('recipes-list')
+
+
+def warm_serializers():
+    for name in djoser_settings.SERIALIZERS.keys():
+        getattr(djoser_settings.SERIALIZERS, name)
+    for serializer_class in SERIALIZERS:
+        serializer_class(context={}).fields
+
+
+def warm_filters():
+    RecipeFilter(data={}, queryset=Recipe.objects.none()).form
+    IngredientFilter(data={}, queryset=Ingredient.objects.none()).form
+
+
+def warm_catalogue():
+    from .views import IngredientViewSet, ingredient_index
+
+    ingredient_index(catalogue_version('ingredients'))
+    # Без ограничений частоты: запросы прогрева не должны тратить
+    # токены анонимов с адреса 127.0.0.1.
+    view = IngredientViewSet.as_view(
+        {'get': 'list'}, throttle_classes=(), throttle_scopes={})
+    factory = RequestFactory()
+    for encoding in (compression.IDENTITY, *compression.ENCODERS):
+        view(factory.get('/api/ingredients/',
+                         HTTP_ACCEPT_ENCODING=encoding))
+
+
+def warm_up():
+    """Прогревает процесс; возвращает время шагов в секундах."""
+    timings = {}
+    for step in (warm_urls, warm_serializers, warm_filters, warm_catalogue):
+        started = time.perf_counter()
+        step()
+        timings[step.__name__] = time.perf_counter() - started
+    # Соединение воркер откроет сам при первом запросе.
+    connections.close_all()
+    return timings
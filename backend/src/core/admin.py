@@ -0,0 +1,124 @@
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+# Ниже этого числа строк оценка pg_class.reltuples не используется:
+# точный COUNT(*) по небольшой таблице дешёвый и не вводит в заблуждение.
+ESTIMATE_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, берущий число строк нефильтрованной таблицы из статистики.
+
+    На PostgreSQL без условий фильтрации вместо COUNT(*) читается
+    pg_class.reltuples; в остальных случаях считается точное значение.
+    Условие менеджера по умолчанию (скрытие мягко удалённых строк)
+    фильтрацией не считается: помеченных строк немного, а оценка
+    и так приблизительная.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and self.is_unfiltered(query):
+            estimate = self.estimate(self.object_list)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+    def is_unfiltered(self, query):
+        default = query.model._default_manager.all().query
+        return query.where == default.where
+
+    @staticmethod
+    def estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+
+class SoftDeleteAdminMixin:
+    """Удаление в админке без обхода зависимых строк коллектором.
+
+    Объекты только помечаются удалёнными, зависимые удалит задача
+    очистки, поэтому страница подтверждения их не перечисляет.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        opts = self.model._meta
+        objs = list(objs)
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(opts.verbose_name)
+        return ([str(obj) for obj in objs],
+                {opts.verbose_name_plural: len(objs)}, perms_needed, [])
+
+
+class SearchInputFilter(admin.SimpleListFilter):
+    """Фильтр по связанной модели с полем ввода вместо списка значений.
+
+    Принимает id или начало значения search_field; не выводит в боковую
+    панель все записи связанной таблицы.
+    """
+    template = 'admin/search_input_filter.html'
+    search_field = None
+
+    def lookups(self, request, model_admin):
+        return ((),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        ]
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(**{self.parameter_name: value})
+        return queryset.filter(**{f'{self.search_field}__istartswith': value})
+
+
+def search_input_filter(field, search_field, title):
+    """Создаёт SearchInputFilter для поля field."""
+    return type(
+        f'{field.title()}SearchInputFilter',
+        (SearchInputFilter,),
+        {'parameter_name': field, 'search_field': search_field,
+         'title': title},
+    )
+
+
+def subquery_count(queryset, field):
+    """Число связанных строк коррелированным подзапросом.
+
+    В отличие от Count() через JOIN не требует GROUP BY по всей
+    таблице и вычисляется только для строк текущей страницы.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
@@ -1,7 +1,11 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
-    verbose_name = 'Ядро'
\ No newline at end of file
+    verbose_name = 'Ядро'
+
+    def ready(self):
+        autodiscover_modules('consumers', 'tasks')
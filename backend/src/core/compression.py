@@ -0,0 +1,80 @@
+"""Сжатие ответов: выбор кодировки по Accept-Encoding и кодеки.
+
+gzip есть всегда; brotli и zstd используются, если установлены пакеты
+brotli и zstandard. Для разовых ответов берутся быстрые уровни сжатия,
+для заранее сжатых и кешируемых — максимальные.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+IDENTITY = 'identity'
+
+
+def gzip_compress(data, best):
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+def brotli_compress(data, best):
+    return brotli.compress(data, quality=11 if best else 5)
+
+
+def zstd_compress(data, best):
+    return zstandard.ZstdCompressor(level=19 if best else 3).compress(data)
+
+
+# В порядке предпочтения сервера.
+ENCODERS = {
+    name: encoder for name, encoder, available in (
+        ('br', brotli_compress, brotli is not None),
+        ('zstd', zstd_compress, zstandard is not None),
+        ('gzip', gzip_compress, True),
+    ) if available
+}
+
+
+def parse_accept_encoding(header):
+    """Возвращает {кодировка: q} из заголовка Accept-Encoding."""
+    accepted = {}
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.lower()] = q
+    return accepted
+
+
+def choose_encoding(header):
+    """Лучшая доступная кодировка, которую принимает клиент, или None."""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for name in ENCODERS:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(data, encoding, best=False):
+    if encoding is None or encoding == IDENTITY:
+        return data
+    return ENCODERS[encoding](data, best)
@@ -0,0 +1,169 @@
+"""Транзакционный outbox и обработчики событий изменений.
+
+Запись события выполняется в той же транзакции, что и само изменение,
+поэтому событие появляется ровно тогда, когда изменение зафиксировано.
+Обработчики регистрируются декоратором ``consumer`` в модулях
+``<app>/consumers.py`` и получают события пачками из команды
+``process_events``.
+"""
+from datetime import timedelta
+from typing import Callable, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChangeEvent, ConsumerOffset
+
+CREATED = ChangeEvent.CREATED
+UPDATED = ChangeEvent.UPDATED
+DELETED = ChangeEvent.DELETED
+
+
+class Consumer(NamedTuple):
+    name: str
+    handler: Callable
+    models: Optional[frozenset]
+
+
+_consumers = {}
+
+
+def label(model):
+    return model._meta.label_lower
+
+
+def record_event(model, action, **payload):
+    """Сохраняет одно событие изменения модели."""
+    return ChangeEvent.objects.create(
+        model=label(model), action=action, payload=payload)
+
+
+def record_events(model, action, payloads):
+    """Сохраняет события пачкой одним запросом."""
+    return ChangeEvent.objects.bulk_create([
+        ChangeEvent(model=label(model), action=action, payload=payload)
+        for payload in payloads
+    ])
+
+
+def consumer(name, models=None):
+    """Регистрирует обработчик пачек событий.
+
+    Обработчик получает список ChangeEvent; если указан models,
+    в пачку попадают только события этих моделей.
+    """
+    def decorator(handler):
+        _consumers[name] = Consumer(
+            name, handler,
+            frozenset(label(model) for model in models) if models else None
+        )
+        return handler
+    return decorator
+
+
+def get_consumers():
+    return dict(_consumers)
+
+
+def gap_ranges(start, ids, seen_at):
+    """Диапазоны id после start, которых нет среди возрастающих ids."""
+    ranges = []
+    previous = start
+    for event_id in ids:
+        if event_id > previous + 1:
+            ranges.append([previous + 1, event_id - 1, seen_at])
+        previous = event_id
+    return ranges
+
+
+def fill_gaps(gaps, ids):
+    """Убирает из диапазонов пропусков прочитанные ids."""
+    remaining = []
+    for first, last, seen_at in gaps:
+        inside = [event_id for event_id in ids if first <= event_id <= last]
+        remaining.extend(gap_ranges(first - 1, inside + [last + 1], seen_at))
+    return remaining
+
+
+def process_batch(name, batch_size=500):
+    """Передаёт обработчику следующую пачку событий и сдвигает позицию.
+
+    Строка позиции блокируется через SELECT ... FOR UPDATE SKIP LOCKED,
+    поэтому несколько воркеров делят обработчики между собой, а не
+    обрабатывают одни и те же события дважды.
+
+    id события выдаётся при вставке, а видно оно после фиксации, поэтому
+    транзакция с меньшим id может зафиксироваться позже прочитанных.
+    Невидимые id ниже позиции запоминаются как пропуски и перечитываются
+    при следующих вызовах, пока не появятся или не пройдёт
+    OUTBOX_GAP_TIMEOUT (пропуски от откаченных транзакций не заполнятся
+    никогда). Такие события приходят обработчику позже более новых.
+    События моложе OUTBOX_SAFETY_LAG не читаются, чтобы реже создавать
+    пропуски.
+
+    Возвращает число просмотренных событий.
+    """
+    registered = _consumers[name]
+    ConsumerOffset.objects.get_or_create(name=name)
+    lag = timedelta(seconds=getattr(settings, 'OUTBOX_SAFETY_LAG', 1))
+    gap_timeout = getattr(settings, 'OUTBOX_GAP_TIMEOUT', 600)
+
+    with transaction.atomic():
+        offset = ConsumerOffset.objects.select_for_update(
+            skip_locked=True).filter(name=name).first()
+        if offset is None:
+            return 0
+
+        now = timezone.now()
+        gaps = [gap for gap in offset.gaps
+                if gap[2] > now.timestamp() - gap_timeout]
+        pending = Q(id__gt=offset.last_event_id)
+        for first, last, _ in gaps:
+            pending |= Q(id__range=(first, last))
+        events = list(ChangeEvent.objects.filter(
+            pending, created__lt=now - lag,
+        ).order_by('id')[:batch_size])
+
+        ids = [event.id for event in events]
+        new_ids = [event_id for event_id in ids
+                   if event_id > offset.last_event_id]
+        gaps = fill_gaps(gaps, ids) + gap_ranges(
+            offset.last_event_id, new_ids, now.timestamp())
+        if not events and gaps == offset.gaps:
+            return 0
+
+        batch = [
+            event for event in events
+            if registered.models is None or event.model in registered.models
+        ]
+        if batch:
+            registered.handler(batch)
+
+        if new_ids:
+            offset.last_event_id = new_ids[-1]
+        offset.gaps = gaps
+        offset.save(update_fields=('last_event_id', 'gaps', 'updated'))
+    return len(events)
+
+
+def prune_processed(chunk_size=5000):
+    """Удаляет события, которые уже прочитали все обработчики."""
+    names = list(_consumers)
+    offsets = ConsumerOffset.objects.filter(name__in=names)
+    if len(names) != offsets.count():
+        return 0
+    # События из незаполненных пропусков ещё могут появиться.
+    border = min((
+        min([offset.last_event_id] + [gap[0] - 1 for gap in offset.gaps])
+        for offset in offsets
+    ), default=0)
+
+    deleted = 0
+    while True:
+        chunk = list(ChangeEvent.objects.filter(
+            id__lte=border).values_list('id', flat=True)[:chunk_size])
+        if not chunk:
+            return deleted
+        deleted += ChangeEvent.objects.filter(id__in=chunk).delete()[0]
@@ -0,0 +1,156 @@
+"""Фоновые задачи в базе данных без внешнего брокера.
+
+Задачи регистрируются декоратором ``task`` в модулях ``<app>/tasks.py``,
+ставятся в очередь функцией ``enqueue`` и выполняются командой
+``runworker``.
+"""
+import traceback
+from datetime import timedelta
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Job
+
+
+class Task(NamedTuple):
+    name: str
+    func: Callable
+    max_attempts: int
+
+
+_tasks = {}
+# Попытки поставить задачу с dedup_key, пока ожидающую такую же забирают.
+ENQUEUE_ATTEMPTS = 3
+
+
+def task(name, max_attempts=3):
+    """Регистрирует функцию задачи.
+
+    Функция получает payload и возвращает результат, сериализуемый
+    в JSON; он сохраняется в Job.result.
+    """
+    def decorator(func):
+        _tasks[name] = Task(name, func, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, dedup_key=None, user=None,
+            delay=None):
+    """Ставит задачу в очередь.
+
+    Если в очереди уже ждёт задача с тем же dedup_key, возвращается она.
+    Уже выполняемые задачи не учитываются: их результат может не
+    включать изменения, из-за которых задачу ставят повторно.
+    """
+    if name not in _tasks:
+        raise KeyError(f'Задача {name} не зарегистрирована')
+    job = Job(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=_tasks[name].max_attempts,
+        dedup_key=dedup_key,
+        user=user,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+    if dedup_key is None:
+        job.save()
+        return job
+    for attempt in range(ENQUEUE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            queued = Job.objects.filter(
+                dedup_key=dedup_key, status=Job.QUEUED).first()
+            if queued is not None:
+                return queued
+            # Задачу из очереди могли успеть забрать: тогда пробуем снова.
+            # Ошибка другого ограничения повторится и будет выброшена.
+            if attempt == ENQUEUE_ATTEMPTS - 1:
+                raise
+
+
+def claim(limit):
+    """Забирает до limit готовых задач, помечая их выполняемыми."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED, run_after__lte=now,
+        ).order_by('-priority', 'id')[:limit])
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=Job.RUNNING, started=now, heartbeat=now)
+    return [job.id for job in jobs]
+
+
+def run(job_id):
+    """Выполняет задачу; при ошибке планирует повтор с задержкой."""
+    close_old_connections()
+    try:
+        job = Job.objects.get(id=job_id)
+        job.attempts += 1
+        try:
+            job.result = _tasks[job.name].func(job.payload)
+        except Exception:
+            job.error = traceback.format_exc()
+            if job.attempts < job.max_attempts:
+                delay = getattr(settings, 'JOBS_RETRY_DELAY', 10)
+                job.status = Job.QUEUED
+                job.run_after = timezone.now() + timedelta(
+                    seconds=delay * 2 ** (job.attempts - 1))
+            else:
+                job.status = Job.FAILED
+                job.finished = timezone.now()
+        else:
+            job.status = Job.DONE
+            job.error = ''
+            job.finished = timezone.now()
+        fields = ('attempts', 'result', 'error', 'status', 'run_after',
+                  'finished')
+        try:
+            with transaction.atomic():
+                job.save(update_fields=fields)
+        except IntegrityError:
+            # Пока задача выполнялась, в очередь встала такая же:
+            # повтор выполнит она.
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+            job.save(update_fields=fields)
+        return job.status
+    finally:
+        close_old_connections()
+
+
+def heartbeat(job_ids):
+    """Отмечает, что воркер ещё выполняет задачи."""
+    if job_ids:
+        Job.objects.filter(id__in=job_ids, status=Job.RUNNING).update(
+            heartbeat=timezone.now())
+
+
+def requeue_stale(timeout):
+    """Возвращает в очередь задачи без сигнала воркера дольше timeout сек.
+
+    Воркер таких задач упал или потерял связь с базой. Если такая же
+    задача уже ждёт в очереди, зависшая завершается с ошибкой: работу
+    выполнит ожидающая.
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        heartbeat__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    requeued = 0
+    for job in stale.only('id'):
+        try:
+            with transaction.atomic():
+                requeued += stale.filter(id=job.id).update(status=Job.QUEUED)
+        except IntegrityError:
+            stale.filter(id=job.id).update(
+                status=Job.FAILED, finished=timezone.now(),
+                error='Воркер перестал отвечать')
+    return requeued
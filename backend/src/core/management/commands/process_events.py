@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.events import get_consumers, process_batch, prune_processed
+
+
+class Command(BaseCommand):
+    help = ('Обработка событий изменений (outbox) '
+            'зарегистрированными обработчиками')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--consumer',
+            action='append',
+            help='Обрабатывать только указанные обработчики',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Размер пачки событий',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами, когда новых событий нет (сек.)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать накопившиеся события и завершиться',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Удалять события, прочитанные всеми обработчиками',
+        )
+
+    def handle(self, *args, **options):
+        consumers = get_consumers()
+        names = options['consumer'] or list(consumers)
+        unknown = set(names) - set(consumers)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные обработчики: {", ".join(sorted(unknown))}')
+        if not names:
+            self.stdout.write(self.style.WARNING(
+                'Нет зарегистрированных обработчиков'))
+            return
+
+        while True:
+            processed = 0
+            for name in names:
+                count = process_batch(name, options['batch_size'])
+                if count:
+                    self.stdout.write(f'{name}: {count} событий')
+                processed += count
+
+            if options['prune']:
+                pruned = prune_processed()
+                if pruned:
+                    self.stdout.write(f'Удалено событий: {pruned}')
+
+            if not processed:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
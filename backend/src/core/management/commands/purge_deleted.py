@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.softdelete import purge, soft_delete_models
+
+
+class Command(BaseCommand):
+    help = ('Окончательное удаление помеченных удалёнными пользователей '
+            'и рецептов вместе с зависимыми строками, пачками')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Число строк в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        for model in soft_delete_models():
+            purged = purge(model, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: удалено {purged}'))
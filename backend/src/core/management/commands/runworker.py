@@ -0,0 +1,92 @@
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполнение фоновых задач из очереди в базе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число параллельно выполняемых задач',
+        )
+        parser.add_argument(
+            '--pool',
+            choices=('thread', 'process'),
+            default='thread',
+            help='Пул потоков или процессов',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди (сек.)',
+        )
+        parser.add_argument(
+            '--stale-timeout',
+            type=int,
+            default=60,
+            help='Через сколько секунд без сигнала от воркера вернуть '
+                 'задачу в очередь',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def requeue_stale(self, timeout):
+        requeued = jobs.requeue_stale(timeout)
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь: {requeued}')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        timeout = options['stale_timeout']
+        # Сигнал подаётся заметно чаще, чем задача считается зависшей.
+        beat_interval = timeout / 3
+        self.requeue_stale(timeout)
+        next_beat = time.monotonic() + beat_interval
+
+        if options['pool'] == 'process':
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        running = {}
+        with executor:
+            while True:
+                if time.monotonic() >= next_beat:
+                    jobs.heartbeat(list(running.values()))
+                    self.requeue_stale(timeout)
+                    next_beat = time.monotonic() + beat_interval
+
+                free = workers - len(running)
+                claimed = jobs.claim(free) if free else []
+                for job_id in claimed:
+                    running[executor.submit(jobs.run, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['interval'],
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        self.stdout.write(
+                            f'Задача #{job_id}: {future.result()}')
+                    except Exception as error:
+                        self.stderr.write(f'Задача #{job_id}: {error!r}')
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+from . import compression
+
+# Сжимаются только JSON-ответы API: в них нет CSRF-токена и других
+# секретов рядом с отражённым вводом, на которых строится атака BREACH.
+COMPRESSIBLE_PATH = '/api/'
+JSON = _lazy_re_compile(r'^application/(?:[\w.-]+\+)?json\b')
+STRONG_ETAG = _lazy_re_compile(r'^\s*"')
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает JSON-ответы API brotli, zstd или gzip по Accept-Encoding.
+
+    HTML (админка, формы с CSRF-токеном) и прочие ответы не сжимаются.
+    Ответы короче COMPRESSION_MIN_SIZE, потоковые ответы и ответы, у
+    которых уже задан Content-Encoding (например, заранее сжатые
+    из кеша), отдаются как есть.
+    """
+
+    def process_response(self, request, response):
+        if not request.path.startswith(COMPRESSIBLE_PATH):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (response.streaming
+                or response.has_header('Content-Encoding')
+                or not JSON.match(response.get('Content-Type', ''))
+                or len(response.content)
+                < getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)):
+            return response
+
+        encoding = compression.choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compression.compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # Сжатое тело отличается побайтно, поэтому ETag становится слабым.
+        etag = response.get('ETag')
+        if etag and STRONG_ETAG.match(etag):
+            response['ETag'] = 'W/' + etag
+        return response
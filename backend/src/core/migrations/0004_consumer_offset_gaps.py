@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumeroffset',
+            name='gaps',
+            field=models.JSONField(blank=True, default=list, verbose_name='Пропуски'),
+        ),
+    ]
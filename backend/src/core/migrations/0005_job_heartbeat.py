@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:15
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_heartbeat(apps, schema_editor):
+    apps.get_model('core', 'Job').objects.filter(
+        status='running').update(heartbeat=F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_consumer_offset_gaps'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='job',
+            name='unique_active_job_dedup_key',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний сигнал воркера'),
+        ),
+        migrations.RunPython(set_heartbeat, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('dedup_key',), name='unique_queued_job_dedup_key'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -8,4 +10,106 @@ class CreatedModel(models.Model):
     )
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class ChangeEvent(CreatedModel):
+    """Запись об изменении, сохраняемая в одной транзакции с изменением."""
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS = (
+        (CREATED, 'Создание'),
+        (UPDATED, 'Изменение'),
+        (DELETED, 'Удаление'),
+    )
+
+    model = models.CharField('Модель', max_length=64)
+    action = models.CharField('Действие', max_length=16, choices=ACTIONS)
+    payload = models.JSONField('Данные', default=dict)
+
+    class Meta:
+        verbose_name = 'Событие изменения'
+        verbose_name_plural = 'События изменений'
+        ordering = ('id',)
+
+    def __str__(self):
+        return f'#{self.id} {self.model} {self.action}'
+
+
+class ConsumerOffset(models.Model):
+    """Позиция обработчика событий в потоке ChangeEvent."""
+    name = models.CharField('Обработчик', max_length=64, unique=True)
+    last_event_id = models.BigIntegerField('Последнее событие', default=0)
+    # Диапазоны [первый id, последний id, время обнаружения] ниже позиции,
+    # события которых ещё не были видны: их транзакции не зафиксированы.
+    gaps = models.JSONField('Пропуски', default=list, blank=True)
+    updated = models.DateTimeField('Дата обновления', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Позиция обработчика'
+        verbose_name_plural = 'Позиции обработчиков'
+
+    def __str__(self):
+        return f'{self.name}: {self.last_event_id}'
+
+
+class Job(CreatedModel):
+    """Фоновая задача, выполняемая командой runworker."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=64)
+    payload = models.JSONField('Параметры', default=dict)
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=QUEUED)
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=3)
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=128, null=True, blank=True)
+    run_after = models.DateTimeField('Запустить после', default=timezone.now)
+    started = models.DateTimeField('Начало', null=True, blank=True)
+    heartbeat = models.DateTimeField(
+        'Последний сигнал воркера', null=True, blank=True)
+    finished = models.DateTimeField('Завершение', null=True, blank=True)
+    result = models.JSONField('Результат', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        null=True,
+        blank=True,
+        verbose_name='Пользователь',
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_after'],
+                         name='job_queue_idx'),
+        ]
+        constraints = [
+            # Выполняемая задача не мешает поставить такую же: изменения,
+            # сделанные после её запуска, обработает новая.
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_job_dedup_key',
+            )
+        ]
+
+    def __str__(self):
+        return f'#{self.id} {self.name} ({self.status})'
@@ -0,0 +1,143 @@
+"""Мягкое удаление и отложенная очистка зависимых строк.
+
+delete() у модели и у queryset менеджера objects только помечает строки
+удалёнными (deleted_at); objects и обратные связи их не видят. Сами строки
+и всё, что на них ссылается, удаляет задача purge_deleted небольшими
+пачками, каждая в своей короткой транзакции, вместо одного каскада
+Django через все таблицы под общей блокировкой.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Отправляется с sender=модель и pks=[...] после пометки строк.
+soft_deleted = Signal()
+
+PURGE_TASK = 'purge_deleted'
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def delete(self):
+        """Помечает строки удалёнными вместе с каскадом soft_cascade."""
+        return soft_delete(
+            self.model, list(self.values_list('pk', flat=True)))
+
+    delete.queryset_only = True
+
+    def hard_delete(self):
+        return super().delete()
+
+    hard_delete.queryset_only = True
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Менеджер только неудалённых строк."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    deleted_at = models.DateTimeField(
+        'Дата удаления', null=True, blank=True, editable=False)
+
+    # Обратные связи, строки которых скрываются вместе с объектом.
+    soft_cascade = ()
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def soft_delete_changes(cls, now):
+        """Поля, записываемые при мягком удалении."""
+        return {'deleted_at': now}
+
+    def delete(self, using=None, keep_parents=False):
+        now = timezone.now()
+        result = soft_delete(type(self), [self.pk], now)
+        for field, value in self.soft_delete_changes(now).items():
+            setattr(self, field, value)
+        return result
+
+    def hard_delete(self, using=None, keep_parents=False):
+        return super().delete(using, keep_parents)
+
+
+@transaction.atomic
+def soft_delete(model, pks, now=None):
+    now = now or timezone.now()
+    changes = model.soft_delete_changes(now)
+    count = model.all_objects.filter(
+        pk__in=pks, deleted_at__isnull=True).update(**changes)
+    for name in model.soft_cascade:
+        relation = model._meta.get_field(name)
+        related_pks = list(relation.related_model.objects.filter(**{
+            f'{relation.field.name}__in': pks}).values_list('pk', flat=True))
+        if related_pks:
+            soft_delete(relation.related_model, related_pks, now)
+    if count:
+        soft_deleted.send(sender=model, pks=pks)
+        transaction.on_commit(schedule_purge)
+    return count, {model._meta.label: count}
+
+
+def schedule_purge():
+    from . import jobs
+
+    jobs.enqueue(PURGE_TASK, dedup_key=PURGE_TASK, delay=timedelta(
+        seconds=getattr(settings, 'SOFT_DELETE_PURGE_DELAY', 0)))
+
+
+def soft_delete_models():
+    return [model for model in apps.get_models()
+            if issubclass(model, SoftDeleteModel)]
+
+
+def chunks(queryset, batch_size):
+    """Первичные ключи строк queryset пачками, пока строки остаются."""
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+
+
+def purge_rows(model, pks, batch_size):
+    """Удаляет строки вместе с зависимыми, зависимые — пачками.
+
+    CASCADE-связи очищаются рекурсивно, SET_NULL обнуляются; к моменту
+    удаления самих строк коллектору Django остаётся только проверить
+    пустые таблицы.
+    """
+    for relation in model._meta.related_objects:
+        if relation.many_to_many or relation.on_delete not in (
+                models.CASCADE, models.SET_NULL):
+            continue
+        related = relation.related_model
+        rows = related._base_manager.filter(
+            **{f'{relation.field.name}__in': pks})
+        for related_pks in chunks(rows, batch_size):
+            if relation.on_delete is models.SET_NULL:
+                related._base_manager.filter(pk__in=related_pks).update(
+                    **{relation.field.name: None})
+            else:
+                purge_rows(related, related_pks, batch_size)
+    with transaction.atomic():
+        model._base_manager.filter(pk__in=pks).delete()
+
+
+def purge(model, batch_size=500):
+    """Окончательно удаляет помеченные строки модели; возвращает их число."""
+    purged = 0
+    deleted = model.all_objects.filter(deleted_at__isnull=False)
+    for pks in chunks(deleted, batch_size):
+        purge_rows(model, pks, batch_size)
+        purged += len(pks)
+    return purged
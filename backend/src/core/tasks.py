@@ -0,0 +1,10 @@
+from .jobs import task
+from .softdelete import PURGE_TASK, purge, soft_delete_models
+
+
+@task(PURGE_TASK)
+def purge_deleted(payload):
+    """Окончательно удаляет помеченные строки всех моделей."""
+    batch_size = payload.get('batch_size', 500)
+    return {model._meta.label: purge(model, batch_size)
+            for model in soft_delete_models()}
@@ -0,0 +1,48 @@
+"""Пакетные связи LinkTable: число запросов не зависит от размера пачки."""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe, UserFavorite
+from users.models import User
+from .toggles import LinkTable
+
+
+class LinkTableBulkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user', first_name='Имя',
+            last_name='Фамилия', password='pass12345!')
+        cls.recipe_ids = [recipe.id for recipe in Recipe.objects.bulk_create([
+            Recipe(author=cls.user, name=f'Рецепт {number}', text='Текст',
+                   cooking_time=10, image='recipes/images/recipe.png')
+            for number in range(50)
+        ])]
+
+    def count_queries(self, func, target_ids):
+        with CaptureQueriesContext(connection) as queries:
+            result = func(self.user.id, target_ids)
+        return len(queries), result
+
+    def test_add_many_constant_queries(self):
+        links = LinkTable(UserFavorite, 'recipe')
+        single, added = self.count_queries(
+            links.add_many, self.recipe_ids[:1])
+        self.assertEqual(added, self.recipe_ids[:1])
+        many, added = self.count_queries(links.add_many, self.recipe_ids)
+        self.assertEqual(sorted(added), self.recipe_ids[1:])
+        self.assertEqual(single, many)
+        self.assertEqual(UserFavorite.objects.count(), len(self.recipe_ids))
+
+    def test_remove_many_constant_queries(self):
+        links = LinkTable(UserFavorite, 'recipe')
+        links.add_many(self.user.id, self.recipe_ids[1:])
+        single, removed = self.count_queries(
+            links.remove_many, self.recipe_ids[:1])
+        self.assertEqual(removed, [])
+        many, removed = self.count_queries(
+            links.remove_many, self.recipe_ids)
+        self.assertEqual(sorted(removed), self.recipe_ids[1:])
+        self.assertEqual(single, many)
+        self.assertFalse(UserFavorite.objects.exists())
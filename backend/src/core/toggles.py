@@ -0,0 +1,278 @@
+"""Добавление и удаление связей «пользователь — объект» одним запросом.
+
+Таблица связей должна иметь уникальную пару (owner_field, target_field).
+На PostgreSQL проверка существования объекта, вставка или удаление связи
+и запись события в outbox выполняются одним выражением с CTE
+(INSERT ... ON CONFLICT DO NOTHING RETURNING / DELETE ... RETURNING).
+На других базах то же делается несколькими запросами в транзакции,
+вставка остаётся безопасной при гонках за счёт ON CONFLICT DO NOTHING.
+Пакетные add_many и remove_many на любой базе — один запрос с RETURNING
+(SQLite поддерживает его с версии 3.35).
+
+Модель связи не сохраняется через ORM, поэтому после вставки и удаления
+строк вручную отправляются post_save(created=True) и post_delete
+с экземпляром, в котором заполнены только первичный ключ и обе связи;
+pre_save и pre_delete не отправляются.
+"""
+import json
+
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from . import events
+from .models import ChangeEvent
+from .softdelete import SoftDeleteModel
+
+
+class LinkTable:
+    def __init__(self, model, target_field, owner_field='user'):
+        opts = model._meta
+        target = opts.get_field(target_field)
+        self.model = model
+        self.db = router.db_for_write(model)
+        self.connection = connections[self.db]
+        self.target_model = target.related_model
+        self.target_fields = self.target_model._meta.concrete_fields
+        owner = opts.get_field(owner_field)
+        self.owner_column = owner.column
+        self.owner_attname = owner.attname
+        self.target_column = target.column
+        self.target_attname = target.attname
+        self.pk_column = opts.pk.column
+        self.extra_fields = [
+            field for field in opts.concrete_fields
+            if getattr(field, 'auto_now_add', False)
+        ]
+
+    def qn(self, name):
+        return self.connection.ops.quote_name(name)
+
+    @property
+    def is_postgresql(self):
+        return self.connection.vendor == 'postgresql'
+
+    def event_cte(self, source, event):
+        """CTE, пишущее событие, если source вернул строку."""
+        if event is None:
+            return '', []
+        action, payload = event
+        opts = ChangeEvent._meta
+        columns = ', '.join(
+            self.qn(opts.get_field(name).column)
+            for name in ('created', 'model', 'action', 'payload'))
+        sql = (
+            f', link_event AS (INSERT INTO {self.qn(opts.db_table)} '
+            f'({columns}) SELECT %s, %s, %s, %s::jsonb FROM {source})'
+        )
+        return sql, [timezone.now(), events.label(self.model), action,
+                     json.dumps(payload)]
+
+    def target_cte(self, target_id, columns):
+        opts = self.target_model._meta
+        live = ''
+        if issubclass(self.target_model, SoftDeleteModel):
+            deleted_at = self.qn(opts.get_field('deleted_at').column)
+            live = f' AND {deleted_at} IS NULL'
+        sql = (
+            f'WITH link_target AS (SELECT {columns} '
+            f'FROM {self.qn(opts.db_table)} '
+            f'WHERE {self.qn(opts.pk.column)} = %s{live})'
+        )
+        return sql, [target_id]
+
+    def instance(self, pk, owner_id, target_id):
+        return self.model(pk=pk, **{self.owner_attname: owner_id,
+                                    self.target_attname: target_id})
+
+    def send_saved(self, pk, owner_id, target_id):
+        post_save.send(sender=self.model,
+                       instance=self.instance(pk, owner_id, target_id),
+                       created=True, update_fields=None, raw=False,
+                       using=self.db)
+
+    def send_deleted(self, pk, owner_id, target_id):
+        instance = self.instance(pk, owner_id, target_id)
+        post_delete.send(sender=self.model, instance=instance,
+                         using=self.db, origin=instance)
+
+    def select_links(self, cursor, owner_id, target_ids):
+        """{id объекта: id связи} для существующих связей владельца."""
+        placeholders = ', '.join(['%s'] * len(target_ids))
+        cursor.execute(
+            f'SELECT {self.qn(self.target_column)}, {self.qn(self.pk_column)} '
+            f'FROM {self.qn(self.model._meta.db_table)} '
+            f'WHERE {self.qn(self.owner_column)} = %s '
+            f'AND {self.qn(self.target_column)} IN ({placeholders})',
+            [owner_id, *target_ids])
+        return dict(cursor.fetchall())
+
+    def delete_link(self, cursor, pk):
+        cursor.execute(
+            f'DELETE FROM {self.qn(self.model._meta.db_table)} '
+            f'WHERE {self.qn(self.pk_column)} = %s', [pk])
+        return cursor.rowcount > 0
+
+    def get_target(self, target_id):
+        return self.target_model._default_manager.using(self.db).filter(
+            pk=target_id).first()
+
+    def insert_head(self):
+        columns = [self.owner_column, self.target_column] + [
+            field.column for field in self.extra_fields]
+        return (
+            f'INSERT INTO {self.qn(self.model._meta.db_table)} '
+            f'({", ".join(self.qn(column) for column in columns)})'
+        )
+
+    def insert_sql(self, select):
+        placeholders = ', '.join(['%s'] * len(self.extra_fields))
+        return (
+            f'{self.insert_head()} '
+            f'{select}{", " if placeholders else ""}{placeholders}'
+        )
+
+    def extra_params(self):
+        now = self.connection.ops.adapt_datetimefield_value(timezone.now())
+        return [now] * len(self.extra_fields)
+
+    def add(self, owner_id, target_id, event_payload=None):
+        """Создаёт связь.
+
+        Возвращает (объект или None, если его нет; создана ли связь).
+        """
+        event = (events.CREATED, event_payload) if event_payload else None
+        if not self.is_postgresql:
+            with transaction.atomic(using=self.db):
+                target = self.get_target(target_id)
+                if target is None:
+                    return None, False
+                with self.connection.cursor() as cursor:
+                    cursor.execute(
+                        self.insert_sql('VALUES (%s, %s')
+                        + ') ON CONFLICT DO NOTHING',
+                        [owner_id, target.pk, *self.extra_params()])
+                    created = cursor.rowcount == 1
+                    pk = cursor.lastrowid
+                if created:
+                    self.send_saved(pk, owner_id, target.pk)
+                    if event_payload:
+                        events.record_event(self.model, events.CREATED,
+                                            **event_payload)
+            return target, created
+
+        fields = self.target_fields
+        columns = ', '.join(self.qn(field.column) for field in fields)
+        target_sql, params = self.target_cte(target_id, columns)
+        pk_column = self.qn(self.target_model._meta.pk.column)
+        event_sql, event_params = self.event_cte('link_inserted', event)
+        sql = (
+            f'{target_sql}, link_inserted AS ('
+            + self.insert_sql(f'SELECT %s, {pk_column}')
+            + f' FROM link_target ON CONFLICT '
+            f'({self.qn(self.owner_column)}, {self.qn(self.target_column)}) '
+            f'DO NOTHING RETURNING {self.qn(self.pk_column)}){event_sql} '
+            f'SELECT {columns}, (SELECT * FROM link_inserted) '
+            f'FROM link_target'
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params + [owner_id, *self.extra_params()]
+                           + event_params)
+            row = cursor.fetchone()
+        if row is None:
+            return None, False
+        target = self.target_model.from_db(
+            self.db, [field.attname for field in fields], row[:-1])
+        pk = row[-1]
+        if pk is not None:
+            self.send_saved(pk, owner_id, target.pk)
+        return target, pk is not None
+
+    def remove(self, owner_id, target_id, event_payload=None):
+        """Удаляет связь.
+
+        Возвращает (существует ли объект; была ли удалена связь).
+        """
+        event = (events.DELETED, event_payload) if event_payload else None
+        table = self.qn(self.model._meta.db_table)
+        condition = (f'{self.qn(self.owner_column)} = %s '
+                     f'AND {self.qn(self.target_column)}')
+        if not self.is_postgresql:
+            with transaction.atomic(using=self.db):
+                with self.connection.cursor() as cursor:
+                    pk = self.select_links(
+                        cursor, owner_id, [target_id]).get(int(target_id))
+                    deleted = pk is not None and self.delete_link(cursor, pk)
+                if deleted:
+                    self.send_deleted(pk, owner_id, int(target_id))
+                    if event_payload:
+                        events.record_event(self.model, events.DELETED,
+                                            **event_payload)
+                    return True, True
+                return self.get_target(target_id) is not None, False
+
+        pk_column = self.qn(self.target_model._meta.pk.column)
+        target_sql, params = self.target_cte(target_id, pk_column)
+        event_sql, event_params = self.event_cte('link_deleted', event)
+        sql = (
+            f'{target_sql}, link_deleted AS (DELETE FROM {table} '
+            f'WHERE {condition} IN (SELECT {pk_column} FROM link_target) '
+            f'RETURNING {self.qn(self.pk_column)}, '
+            f'{self.qn(self.target_column)}){event_sql} '
+            f'SELECT EXISTS(SELECT 1 FROM link_target), link_deleted.* '
+            f'FROM (SELECT 1) AS one LEFT JOIN link_deleted ON TRUE'
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params + [owner_id] + event_params)
+            exists, pk, deleted_target = cursor.fetchone()
+        if pk is not None:
+            self.send_deleted(pk, owner_id, deleted_target)
+        return exists, pk is not None
+
+    def add_many(self, owner_id, target_ids):
+        """Создаёт связи с существующими объектами пачкой.
+
+        Возвращает id объектов, связи с которыми созданы этим вызовом;
+        уже существующие связи, в том числе вставленные параллельно,
+        пропускаются.
+        """
+        if not target_ids:
+            return []
+        extra = self.extra_params()
+        row = ', '.join(['%s'] * (2 + len(extra)))
+        sql = (
+            f'{self.insert_head()} '
+            f'VALUES {", ".join([f"({row})"] * len(target_ids))} '
+            f'ON CONFLICT DO NOTHING RETURNING {self.qn(self.pk_column)}, '
+            f'{self.qn(self.target_column)}'
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, [
+                param for target_id in target_ids
+                for param in (owner_id, target_id, *extra)
+            ])
+            rows = cursor.fetchall()
+        for pk, target_id in rows:
+            self.send_saved(pk, owner_id, target_id)
+        return [target_id for _pk, target_id in rows]
+
+    def remove_many(self, owner_id, target_ids):
+        """Удаляет связи пачкой.
+
+        Возвращает id объектов, связи с которыми удалены этим вызовом.
+        """
+        if not target_ids:
+            return []
+        table = self.qn(self.model._meta.db_table)
+        owner, target = self.qn(self.owner_column), self.qn(self.target_column)
+        placeholders = ', '.join(['%s'] * len(target_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {owner} = %s '
+                f'AND {target} IN ({placeholders}) '
+                f'RETURNING {self.qn(self.pk_column)}, {target}',
+                [owner_id, *target_ids])
+            rows = cursor.fetchall()
+        for pk, target_id in rows:
+            self.send_deleted(pk, owner_id, target_id)
+        return [target_id for _pk, target_id in rows]
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     'djoser',
     'django_filters',
 
+    'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
@@ -30,6 +31,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,6 +79,18 @@ else:
         }
     }
 
+# Кеш, общий для всех процессов: воркеров gunicorn, process_events,
+# runworker и manage.py. Сбросы кеша токенов, профилей, версий справочников
+# и планов питания должны быть видны везде. По умолчанию это таблица
+# в базе (manage.py createcachetable); для Redis задайте CACHE_BACKEND=
+# django.core.cache.backends.redis.RedisCache и CACHE_LOCATION=redis://...
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'django_cache'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -94,6 +108,9 @@ STATIC_ROOT = BASE_DIR / 'static'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_CDN_ORIGIN = os.getenv('MEDIA_CDN_ORIGIN', '')
+MEDIA_URL_SIGNING_KEY = os.getenv('MEDIA_URL_SIGNING_KEY', '')
+MEDIA_URL_TTL = int(os.getenv('MEDIA_URL_TTL', 3600))
 
 AUTH_USER_MODEL = 'users.User'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -112,9 +129,44 @@ DJOSER = {
 }
 
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    'DEFAULT_AUTHENTICATION_CLASSES': ['api.authentication.CachedTokenAuthentication'],
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticatedOrReadOnly'],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_THROTTLE_RATES': {
+        'writes': os.getenv('THROTTLE_WRITES', '60/min'),
+        'uploads': os.getenv('THROTTLE_UPLOADS', '20/min'),
+        'toggles': os.getenv('THROTTLE_TOGGLES', '120/min'),
+        'autocomplete': os.getenv('THROTTLE_AUTOCOMPLETE', '600/min'),
+    },
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'api.renderers.AvailableRenderersNegotiation',
+    # Число прокси перед приложением (nginx из infra/): адрес клиента для
+    # ограничений берётся из X-Forwarded-For, записанного последним прокси,
+    # а не из значения, присланного клиентом.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0 if DEBUG else 1)),
 }
+
+TOKEN_CACHE_SHARED_TTL = int(os.getenv('TOKEN_CACHE_SHARED_TTL', 300))
+THROTTLE_USE_SHARED_CACHE = os.getenv('THROTTLE_USE_SHARED_CACHE', 'False') == 'True'
+# Сколько секунд перечитывать пропуски в id событий outbox: события
+# транзакций, зафиксированных позже более новых.
+OUTBOX_GAP_TIMEOUT = int(os.getenv('OUTBOX_GAP_TIMEOUT', 600))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', 10))
+RECOMMENDATIONS_TOP_K = int(os.getenv('RECOMMENDATIONS_TOP_K', 20))
+# Окно «недавней» популярности ингредиентов (дни) и минимальный
+# интервал пересчёта после изменений рецептов (сек.).
+INGREDIENT_USAGE_WINDOW = int(os.getenv('INGREDIENT_USAGE_WINDOW', 30))
+INGREDIENT_USAGE_REFRESH_INTERVAL = int(
+    os.getenv('INGREDIENT_USAGE_REFRESH_INTERVAL', 300))
+NOTIFICATIONS_CHUNK_SIZE = int(os.getenv('NOTIFICATIONS_CHUNK_SIZE', 1000))
+AUTHOR_PROFILE_CACHE_TTL = int(os.getenv('AUTHOR_PROFILE_CACHE_TTL', 600))
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+# Через сколько секунд после мягкого удаления запускается очистка.
+SOFT_DELETE_PURGE_DELAY = int(os.getenv('SOFT_DELETE_PURGE_DELAY', 0))
@@ -0,0 +1,16 @@
+# Читается gunicorn из рабочего каталога (/app) автоматически.
+
+
+def post_worker_init(worker):
+    """Прогрев воркера до приёма первого запроса."""
+    try:
+        from api.warmup import warm_up
+
+        timings = warm_up()
+    except Exception:
+        # Холодный воркер лучше, чем упавший.
+        worker.log.exception('Прогрев воркера не удался')
+        return
+    worker.log.info('Воркер прогрет за %.3f с: %s', sum(timings.values()),
+                    ', '.join(f'{name} {value:.3f}'
+                              for name, value in timings.items()))
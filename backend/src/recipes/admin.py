@@ -1,14 +1,40 @@
+import csv
+
 from django.contrib import admin
-from django.db.models import Count
+from django.http import StreamingHttpResponse
 
+from core.admin import (
+    EstimatedCountPaginator,
+    SoftDeleteAdminMixin,
+    search_input_filter,
+    subquery_count,
+)
+from .nutrition import recompute_totals
 from .models import (
     Ingredient,
     Recipe,
     RecipeComponent,
     UserFavorite,
     GroceryList,
+    MealPlan,
+    Notification,
+    RecipeRevision,
 )
 
+# Формат CSV общий для экспорта в админке и команды import_recipes.
+CSV_HEADER = [
+    "id", "name", "author", "ingredient", "amount", "unit",
+    "author_email", "cooking_time", "text", "image",
+]
+EXPORT_CHUNK_SIZE = 500
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
 
 class RecipeComponentInline(admin.TabularInline):
     model = RecipeComponent
@@ -21,21 +47,36 @@ class RecipeComponentInline(admin.TabularInline):
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "measurement_unit", "recipes_count")
+    list_display = (
+        "id",
+        "name",
+        "measurement_unit",
+        "recipes_count",
+        "recent_recipes_count",
+    )
     search_fields = ("name",)
     list_filter = ("measurement_unit",)
-
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(recipes_total=Count("used_in_recipes"))
-
-    @admin.display(description="Кол-во рецептов")
+    list_select_related = ("usage",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Числа из IngredientUsage (refresh_ingredient_usage), а не подсчёт
+    # по всем компонентам при каждом открытии страницы.
+    @admin.display(description="Кол-во рецептов",
+                   ordering="usage__recipes_total")
     def recipes_count(self, obj):
-        return obj.recipes_total
+        usage = getattr(obj, "usage", None)
+        return usage.recipes_total if usage else 0
+
+    @admin.display(description="За последние дни",
+                   ordering="usage__recipes_recent")
+    def recent_recipes_count(self, obj):
+        usage = getattr(obj, "usage", None)
+        return usage.recipes_recent if usage else 0
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "name",
@@ -43,7 +84,13 @@ class RecipeAdmin(admin.ModelAdmin):
         "pub_date",
         "favorites_count",
     )
-    list_filter = ("author", "pub_date")
+    list_filter = (
+        search_input_filter("author", "author__username", "автору"),
+        "pub_date",
+    )
+    list_select_related = ("author",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = (
         "name",
         "author__username",
@@ -58,7 +105,12 @@ class RecipeAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.annotate(fav_total=Count("in_favorites"))
+        return qs.annotate(
+            fav_total=subquery_count(UserFavorite.objects.all(), "recipe"))
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        recompute_totals([form.instance.pk])
 
     @admin.display(description="В избранном")
     def favorites_count(self, obj):
@@ -68,41 +120,103 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @admin.action(description="Экспортировать рецепты (+ ингредиенты) в CSV")
     def export_recipes_to_csv(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type="text/csv")
+        writer = csv.writer(Echo())
+        recipes = (
+            Recipe.objects.filter(pk__in=queryset.values("pk"))
+            .select_related("author")
+            .prefetch_related("components__ingredient")
+            .order_by("pk")
+        )
+
+        def rows():
+            yield writer.writerow(CSV_HEADER)
+            for recipe in recipes.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                for comp in recipe.components.all():
+                    yield writer.writerow(
+                        [
+                            recipe.id,
+                            recipe.name,
+                            recipe.author.get_full_name() or recipe.author.username,
+                            comp.ingredient.name,
+                            comp.amount,
+                            comp.ingredient.measurement_unit,
+                            recipe.author.email,
+                            recipe.cooking_time,
+                            recipe.text,
+                            recipe.image.name,
+                        ]
+                    )
+
+        response = StreamingHttpResponse(rows(), content_type="text/csv")
         response["Content-Disposition"] = "attachment; filename=recipes.csv"
-        writer = csv.writer(response)
-        writer.writerow(
-            ["id", "name", "author", "ingredient", "amount", "unit"])
-
-        for recipe in queryset.prefetch_related("components__ingredient", "author"):
-            for comp in recipe.components.all():
-                writer.writerow(
-                    [
-                        recipe.id,
-                        recipe.name,
-                        recipe.author.get_full_name() or recipe.author.username,
-                        comp.ingredient.name,
-                        comp.amount,
-                        comp.ingredient.measurement_unit,
-                    ]
-                )
         return response
 
 
 @admin.register(UserFavorite)
 class UserFavoriteAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "recipe", "added_at")
-    list_filter = ("user", "recipe")
+    list_filter = (
+        search_input_filter("user", "user__username", "пользователю"),
+        search_input_filter("recipe", "recipe__name", "рецепту"),
+    )
+    list_select_related = ("user", "recipe__author")
     search_fields = ("user__username", "recipe__name")
     autocomplete_fields = ("user", "recipe")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(GroceryList)
 class GroceryListAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "recipe", "added_at")
-    list_filter = ("user", "recipe")
+    list_filter = (
+        search_input_filter("user", "user__username", "пользователю"),
+        search_input_filter("recipe", "recipe__name", "рецепту"),
+    )
+    list_select_related = ("user", "recipe__author")
     search_fields = ("user__username", "recipe__name")
     autocomplete_fields = ("user", "recipe")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(MealPlan)
+class MealPlanAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "date", "slot", "recipe", "servings")
+    list_filter = (
+        search_input_filter("user", "user__username", "пользователю"),
+        "slot",
+    )
+    list_select_related = ("user", "recipe__author")
+    search_fields = ("user__username", "recipe__name")
+    autocomplete_fields = ("user", "recipe")
+    date_hierarchy = "date"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(RecipeRevision)
+class RecipeRevisionAdmin(admin.ModelAdmin):
+    list_display = ("id", "recipe", "editor", "created", "edits")
+    list_filter = (
+        search_input_filter("recipe", "recipe__name", "рецепту"),
+    )
+    list_select_related = ("recipe__author", "editor")
+    readonly_fields = ("recipe", "editor", "created", "changes", "edits")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "recipe", "count", "is_digest", "is_read",
+                    "created")
+    list_filter = (
+        search_input_filter("user", "user__username", "пользователю"),
+        "is_digest",
+        "is_read",
+    )
+    list_select_related = ("user", "recipe__author")
+    autocomplete_fields = ("user", "recipe")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,25 @@
+from core.events import CREATED, consumer
+from . import notifications, recommendations, usage
+from .importers import IMPORT_SOURCE
+from .models import GroceryList, Recipe, RecipeComponent, UserFavorite
+
+
+@consumer('recommendations', models=(UserFavorite, GroceryList))
+def refresh_recommendations(batch):
+    recommendations.refresh({event.payload['recipe'] for event in batch})
+
+
+@consumer('ingredient_usage', models=(Recipe, RecipeComponent))
+def schedule_usage_refresh(batch):
+    # Повторные изменения до запуска задачи попадут в тот же пересчёт.
+    usage.schedule_refresh()
+
+
+@consumer('notifications', models=(Recipe,))
+def schedule_notifications(batch):
+    # Импортированные рецепты не новые для подписчиков автора.
+    notifications.schedule([
+        event.payload['id'] for event in batch
+        if event.action == CREATED
+        and event.payload.get('source') != IMPORT_SOURCE
+    ])
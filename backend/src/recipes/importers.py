@@ -0,0 +1,362 @@
+"""Импорт рецептов из внешних форматов.
+
+Поддерживаются schema.org Recipe в JSON-LD (объект, список, @graph или
+HTML-страница со скриптами application/ld+json) и строки ингредиентов
+обычным текстом. Из строки выделяются количество, единица и название;
+название сопоставляется с каталогом Ingredient через индекс
+нормализованных названий в памяти с нечётким поиском (difflib), так что
+разбор не делает запросов к базе на каждую строку.
+"""
+import base64
+import difflib
+import json
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import List, NamedTuple, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from core import events
+from .models import Ingredient, Recipe, RecipeComponent
+from .nutrition import recompute_totals
+from .quantities import ALIASES, UNITS, convert, get_unit
+
+FRACTIONS = {'½': '1/2', '⅓': '1/3', '⅔': '2/3', '¼': '1/4', '¾': '3/4',
+             '⅕': '1/5', '⅛': '1/8'}
+NUMBER = r'\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?'
+UNIT_NAMES = sorted({*UNITS, *ALIASES}, key=len, reverse=True)
+UNIT = '|'.join(re.escape(name) for name in UNIT_NAMES)
+
+# Отметка в событиях о рецептах, созданных импортом: подписчиков
+# о них не уведомляют.
+IMPORT_SOURCE = 'import'
+# Картинка импортированных рецептов: поле image обязательно, а внешние
+# картинки не скачиваются. Серый PNG 1×1 растягивается на любой размер.
+PLACEHOLDER_IMAGE = 'recipe_photos/placeholder.png'
+PLACEHOLDER_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAAAAAA6fptVAAAACklEQVR4nGO4CwAA3wDe'
+    'KXlwtgAAAABJRU5ErkJggg=='
+)
+# «200 г муки», «1 1/2 ст. л. сахара», «2-3 шт. яйца».
+LEADING = re.compile(
+    rf'^(?P<amount>{NUMBER})(?:\s*[-–]\s*(?:{NUMBER}))?\s*'
+    rf'(?:(?P<unit>{UNIT})(?=[\s,.]|$))?\s*(?P<name>.*)$',
+    re.IGNORECASE)
+# «Мука — 200 г», «Сахар: 2 ст. л.», «Яйца 3 шт.».
+TRAILING = re.compile(
+    rf'^(?P<name>.+?)\s*[-–—:,]?\s*(?P<amount>{NUMBER})'
+    rf'(?:\s*[-–]\s*(?:{NUMBER}))?\s*(?P<unit>{UNIT})?\.?$',
+    re.IGNORECASE)
+# Пометки без количества в конце строки.
+NO_AMOUNT = re.compile(r'\s*[-–—,]?\s*(по вкусу|для подачи|щепотка)$',
+                       re.IGNORECASE)
+DURATION = re.compile(
+    r'^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?'
+    r'(?:\d+S)?)?$', re.IGNORECASE)
+LD_JSON = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL)
+
+# Грубое отсечение окончаний, чтобы «муки» совпадало с «мука».
+ENDING = re.compile(
+    r'(ами|ями|ого|его|ому|ему|ыми|ими|ой|ей|ая|яя|ое|ее|ые|ие|ых|их|'
+    r'ом|ем|ам|ям|ах|ях|ов|ев|а|я|ы|и|у|ю|е|о|ь|й)$')
+FUZZY_CUTOFF = 0.8
+
+
+class ParsedLine(NamedTuple):
+    source: str
+    name: str
+    amount: Optional[Decimal]
+    unit: Optional[str]
+
+
+class Component(NamedTuple):
+    source: str
+    ingredient_id: Optional[int]
+    name: str
+    measurement_unit: Optional[str]
+    amount: Optional[int]
+    match: Optional[str]
+    note: Optional[str] = None
+
+
+class Draft(NamedTuple):
+    name: str
+    text: str
+    cooking_time: Optional[int]
+    image: Optional[str]
+    components: List[Component]
+
+    @property
+    def unresolved(self):
+        return [item.source for item in self.components
+                if item.ingredient_id is None]
+
+
+def normalize(name):
+    name = name.lower().replace('ё', 'е')
+    name = re.sub(r'\(.*?\)', ' ', name)
+    name = re.sub(r'[^\w\s-]', ' ', name)
+    # Порядок слов не важен: «мука пшеничная» и «пшеничная мука».
+    return ' '.join(sorted(
+        ENDING.sub('', word) if len(word) > 3 else word
+        for word in name.split()
+    ))
+
+
+def parse_amount(value):
+    value = value.replace(',', '.').strip()
+    try:
+        whole, _, fraction = value.rpartition(' ')
+        if '/' in value:
+            numerator, denominator = (fraction or value).split('/')
+            amount = Decimal(numerator) / Decimal(denominator)
+            return amount + (Decimal(whole) if whole else 0)
+        return Decimal(value)
+    except (InvalidOperation, ZeroDivisionError, ValueError):
+        return None
+
+
+def parse_line(line):
+    """Разбирает строку ингредиента на название, количество и единицу."""
+    source = ' '.join(line.split())
+    text = source.lstrip('-–—•* ')
+    for short, fraction in FRACTIONS.items():
+        text = text.replace(short, f' {fraction}')
+    text = ' '.join(text.split())
+    match = LEADING.match(text) or TRAILING.match(text)
+    if match is None or not match['name'].strip(' ,.-–—:'):
+        return ParsedLine(source, NO_AMOUNT.sub('', text), None, None)
+    unit = get_unit(match['unit']) if match['unit'] else None
+    return ParsedLine(
+        source,
+        match['name'].strip(' ,.-–—:'),
+        parse_amount(match['amount']),
+        unit.name if unit else None,
+    )
+
+
+class IngredientIndex:
+    """Каталог ингредиентов, индексированный по нормализованному названию.
+
+    rows — тройки (id, название, единица), как из
+    Ingredient.objects.values_list('id', 'name', 'measurement_unit').
+    """
+
+    def __init__(self, rows):
+        self.by_name = {}
+        for pk, name, unit in rows:
+            self.by_name.setdefault(normalize(name), []).append(
+                (pk, name, unit))
+        self.names = list(self.by_name)
+
+    @classmethod
+    def from_catalogue(cls):
+        return cls(Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit'))
+
+    def lookup(self, name):
+        """Кандидаты и способ совпадения: exact, fuzzy, partial или None.
+
+        partial — самое короткое название каталога, содержащее все
+        слова строки («яйца» → «яйца куриные»).
+        """
+        key = normalize(name)
+        if not key:
+            return [], None
+        if key in self.by_name:
+            return self.by_name[key], 'exact'
+        close = difflib.get_close_matches(
+            key, self.names, n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            return self.by_name[close[0]], 'fuzzy'
+        words = set(key.split())
+        containing = [other for other in self.names
+                      if words <= set(other.split())]
+        if containing:
+            return self.by_name[min(containing, key=len)], 'partial'
+        return [], None
+
+    def resolve(self, line):
+        """Сопоставляет разобранную строку с ингредиентом каталога.
+
+        Из нескольких ингредиентов с одним названием выбирается тот,
+        в чью единицу количество переводится; количество округляется
+        до целого, но не меньше единицы.
+        """
+        parsed = parse_line(line) if isinstance(line, str) else line
+        candidates, match = self.lookup(parsed.name)
+        if not candidates:
+            return Component(parsed.source, None, parsed.name, parsed.unit,
+                             None, None)
+        amount = note = None
+        chosen = candidates[0]
+        if parsed.amount is not None:
+            amount = parsed.amount
+            for candidate in candidates:
+                converted = convert(parsed.amount, parsed.unit or '',
+                                    candidate[2])
+                if converted is not None:
+                    chosen, amount = candidate, converted
+                    break
+            else:
+                if parsed.unit:
+                    note = (f'Единица «{parsed.unit}» не переводится '
+                            f'в «{chosen[2]}»')
+        pk, name, unit = chosen
+        amount = max(1, int(Decimal(amount or 1).quantize(
+            Decimal('1'), rounding=ROUND_HALF_UP)))
+        return Component(parsed.source, pk, name, unit, amount, match, note)
+
+
+def minutes(duration):
+    """Переводит ISO 8601 длительность (PT1H30M) в минуты."""
+    match = DURATION.match(duration or '')
+    if match is None:
+        return None
+    total = (int(match['days'] or 0) * 24 * 60
+             + int(match['hours'] or 0) * 60 + int(match['minutes'] or 0))
+    return total or None
+
+
+def instructions_text(instructions):
+    if isinstance(instructions, str):
+        return instructions.strip()
+    if isinstance(instructions, dict):
+        if 'itemListElement' in instructions:
+            return instructions_text(instructions['itemListElement'])
+        return str(instructions.get('text', '')).strip()
+    if isinstance(instructions, list):
+        return '\n'.join(filter(None, map(instructions_text, instructions)))
+    return ''
+
+
+def image_url(image):
+    if isinstance(image, list):
+        return image_url(image[0]) if image else None
+    if isinstance(image, dict):
+        return image.get('url')
+    return image or None
+
+
+def find_recipes(data):
+    """Находит объекты schema.org Recipe в разобранном JSON-LD."""
+    if isinstance(data, list):
+        return [recipe for item in data for recipe in find_recipes(item)]
+    if not isinstance(data, dict):
+        return []
+    if '@graph' in data:
+        return find_recipes(data['@graph'])
+    types = data.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return [data] if 'Recipe' in types else []
+
+
+def load_jsonld(content):
+    """Разбирает JSON-LD из JSON-строки, HTML-страницы или объекта."""
+    if not isinstance(content, str):
+        return find_recipes(content)
+    blocks = LD_JSON.findall(content) or [content]
+    recipes = []
+    for block in blocks:
+        try:
+            recipes.extend(find_recipes(json.loads(block)))
+        except ValueError:
+            continue
+    return recipes
+
+
+def merge(components):
+    """Складывает повторяющиеся ингредиенты одного рецепта."""
+    merged = {}
+    result = []
+    for item in components:
+        if item.ingredient_id is None:
+            result.append(item)
+        elif item.ingredient_id in merged:
+            index = merged[item.ingredient_id]
+            result[index] = result[index]._replace(
+                amount=result[index].amount + item.amount)
+        else:
+            merged[item.ingredient_id] = len(result)
+            result.append(item)
+    return result
+
+
+def draft_from_lines(lines, index, name='', text='', cooking_time=None,
+                     image=None):
+    lines = [line for line in lines if line.strip()]
+    return Draft(name, text, cooking_time, image,
+                 merge(index.resolve(line) for line in lines))
+
+
+def draft_from_jsonld(recipe, index):
+    ingredients = recipe.get('recipeIngredient') or recipe.get(
+        'ingredients') or []
+    if isinstance(ingredients, str):
+        ingredients = ingredients.splitlines()
+    cooking_time = minutes(recipe.get('totalTime')) or sum(
+        filter(None, (minutes(recipe.get('prepTime')),
+                      minutes(recipe.get('cookTime'))))) or None
+    return draft_from_lines(
+        [str(line) for line in ingredients], index,
+        name=str(recipe.get('name', '')).strip()[:256],
+        text=instructions_text(recipe.get('recipeInstructions'))
+        or str(recipe.get('description', '')).strip(),
+        cooking_time=cooking_time,
+        image=image_url(recipe.get('image')),
+    )
+
+
+def placeholder_image():
+    """Путь к картинке-заглушке; файл создаётся при первом вызове."""
+    if default_storage.exists(PLACEHOLDER_IMAGE):
+        return PLACEHOLDER_IMAGE
+    return default_storage.save(PLACEHOLDER_IMAGE,
+                                ContentFile(PLACEHOLDER_PNG))
+
+
+@transaction.atomic
+def save_drafts(drafts, author_id, default_cooking_time=1):
+    """Создаёт рецепты пачкой: фиксированное число запросов на пачку.
+
+    Нераспознанные строки пропускаются; черновики без распознанных
+    ингредиентов не сохраняются. Картинки по внешним ссылкам не
+    скачиваются: рецепты получают общую заглушку PLACEHOLDER_IMAGE.
+    Возвращает созданные рецепты.
+    """
+    drafts = [draft for draft in drafts
+              if draft.name and any(item.ingredient_id
+                                    for item in draft.components)]
+    image = placeholder_image() if drafts else ''
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            name=draft.name,
+            text=draft.text or draft.name,
+            author_id=author_id,
+            cooking_time=draft.cooking_time or default_cooking_time,
+            image=image,
+        )
+        for draft in drafts
+    ])
+    RecipeComponent.objects.bulk_create([
+        RecipeComponent(recipe=recipe, ingredient_id=item.ingredient_id,
+                        amount=min(item.amount, 32767))
+        for recipe, draft in zip(recipes, drafts)
+        for item in draft.components if item.ingredient_id
+    ])
+    recompute_totals([recipe.id for recipe in recipes])
+    events.record_events(
+        Recipe, events.CREATED,
+        [{'id': recipe.id, 'author': author_id, 'source': IMPORT_SOURCE}
+         for recipe in recipes])
+    events.record_events(
+        RecipeComponent, events.UPDATED,
+        [{'recipe': recipe.id,
+          'ingredients': [item.ingredient_id for item in draft.components
+                          if item.ingredient_id]}
+         for recipe, draft in zip(recipes, drafts)])
+    return recipes
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipes import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт похожих рецептов по избранному и спискам покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipe',
+            type=int,
+            action='append',
+            help='Пересчитать только указанные рецепты',
+        )
+
+    def handle(self, *args, **options):
+        if options['recipe']:
+            total = recommendations.refresh(options['recipe'])
+        else:
+            total = recommendations.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты пересчитаны для {total} рецептов'))
@@ -0,0 +1,135 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from recipes.models import (
+    GroceryList, IngredientUsage, Recipe, RecipeComponent, UserFavorite,
+)
+from users.models import Subscription, User
+
+# Полный проход по таблице в выводе EXPLAIN; для SQLite — и по индексу.
+FULL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)'),
+}
+# Чтение первых строк в порядке индекса (ORDER BY ... LIMIT); в плане
+# PostgreSQL это Index Scan, который полным проходом не считается.
+INDEX_WALK = {
+    'sqlite': re.compile(r'\bSCAN \w+ USING (?:COVERING )?INDEX'),
+}
+# Сортировка результата вместо чтения в порядке индекса.
+SORT = {
+    'postgresql': re.compile(r'\bSort\b'),
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (?:\w+ )*ORDER BY'),
+}
+
+
+def plan_problems(plan, vendor, walks_index=False, sorts=False):
+    """Строки плана с полным проходом или сортировкой.
+
+    walks_index разрешает проход по индексу в нужном порядке: запрос
+    с LIMIT останавливается на первых подходящих строках. sorts
+    разрешает сортировку: строки ограничены связями одного пользователя,
+    а порядок задаёт столбец другой таблицы, которого нет в индексе.
+    """
+    index_walk = INDEX_WALK.get(vendor) if walks_index else None
+    problems = []
+    for line in plan.splitlines():
+        line = line.strip()
+        if index_walk and index_walk.search(line):
+            continue
+        if FULL_SCAN[vendor].search(line) or (
+                not sorts and SORT[vendor].search(line)):
+            problems.append(line)
+    return problems
+
+
+def hot_queries(user_id, recipe_ids, ingredient_id):
+    """Горячие запросы API: {название: (queryset, walks_index, sorts)}."""
+    with_ingredient = RecipeComponent.objects.filter(
+        recipe=OuterRef('pk'), ingredient_id=ingredient_id)
+    return {
+        'рецепты автора': (Recipe.objects.filter(
+            author_id=user_id).order_by('-pub_date')[:6], False, False),
+        'избранное': (Recipe.objects.filter(
+            in_favorites__user=user_id).order_by('-pub_date')[:6],
+            False, True),
+        'список покупок': (Recipe.objects.filter(
+            in_grocery_lists__user=user_id).order_by('-pub_date')[:6],
+            False, True),
+        'последние избранные': (UserFavorite.objects.filter(
+            user_id=user_id).order_by('-added_at')[:6], False, False),
+        'последние в списке покупок': (GroceryList.objects.filter(
+            user_id=user_id).order_by('-added_at')[:6], False, False),
+        'состав рецептов': (RecipeComponent.objects.filter(
+            recipe_id__in=recipe_ids or [0]).values_list(
+            'recipe_id', 'ingredient_id', 'amount'), False, False),
+        'по времени приготовления': (Recipe.objects.filter(
+            cooking_time__range=(5, 15)).order_by('cooking_time')[:6],
+            False, False),
+        'с ингредиентом': (Recipe.objects.filter(
+            Exists(with_ingredient)).order_by('-pub_date')[:6],
+            True, False),
+        'без ингредиента': (Recipe.objects.filter(
+            author_id=user_id).exclude(
+            Exists(with_ingredient)).order_by('-pub_date')[:6],
+            False, False),
+        'популярные ингредиенты': (IngredientUsage.objects.filter(
+            recipes_recent__gt=0).order_by(
+            '-recipes_recent', 'ingredient_id')[:10], True, False),
+        'подписки': (User.objects.filter(
+            subscribers__user=user_id).order_by('username'), False, True),
+        'подписчики': (Subscription.objects.filter(
+            author_id=user_id).values_list('user_id', flat=True),
+            False, False),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Проверка планов горячих запросов API: ни один не должен '
+            'читать таблицу целиком или сортировать то, что даёт индекс')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Печатать планы всех запросов',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FULL_SCAN:
+            raise CommandError(
+                f'Разбор планов для {vendor} не поддерживается')
+
+        queries = hot_queries(
+            User.objects.values_list('id', flat=True).first() or 0,
+            list(Recipe.objects.values_list('id', flat=True)[:6]),
+            RecipeComponent.objects.values_list(
+                'ingredient_id', flat=True).first() or 0,
+        )
+        failed = []
+        with transaction.atomic():
+            if vendor == 'postgresql':
+                # На маленькой базе планировщик предпочтёт Seq Scan и Sort
+                # даже при подходящем индексе; так остаётся только его
+                # отсутствие.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    cursor.execute('SET LOCAL enable_sort = off')
+            for name, (queryset, walks_index, sorts) in queries.items():
+                plan = queryset.explain()
+                if options['verbose_plans']:
+                    self.stdout.write(f'{name}:\n{plan}\n')
+                problems = plan_problems(plan, vendor, walks_index, sorts)
+                if problems:
+                    failed.append(name)
+                    self.stderr.write(f'{name}: {"; ".join(problems)}')
+
+        if failed:
+            raise CommandError(
+                f'Запросов с полным проходом или сортировкой: {len(failed)}')
+        self.stdout.write(self.style.SUCCESS(
+            'Все горячие запросы используют индексы'))
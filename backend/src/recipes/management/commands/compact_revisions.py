@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.revisions import compact_recipe, compactable_recipes
+
+
+class Command(BaseCommand):
+    help = ('Сжатие истории рецептов: старые ревизии каждого рецепта '
+            'сливаются в одну разницу')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=20,
+            help='Сколько последних ревизий рецепта не трогать',
+        )
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=30,
+            help='Сливать только ревизии старше стольких дней',
+        )
+
+    def handle(self, *args, **options):
+        keep = max(0, options['keep'])
+        before = timezone.now() - timedelta(days=options['older_than'])
+        recipes = removed = 0
+        for recipe_id in list(compactable_recipes(keep, before)):
+            count = compact_recipe(recipe_id, keep, before)
+            recipes += bool(count)
+            removed += count
+        self.stdout.write(self.style.SUCCESS(
+            f'Сжата история рецептов: {recipes}, '
+            f'удалено ревизий: {removed}'
+        ))
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiles import invalidate_author_profiles
+from recipes.importers import (
+    IngredientIndex, draft_from_jsonld, draft_from_lines, load_jsonld,
+    save_drafts,
+)
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Импорт рецептов из schema.org JSON-LD, HTML-страниц '
+            'или текстовых файлов со строками ингредиентов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', type=str,
+                            help='Файлы .json, .html или .txt')
+        parser.add_argument('--author', required=True,
+                            help='Email автора рецептов')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Число рецептов в одной транзакции',
+        )
+
+    def read_drafts(self, path, index):
+        content = Path(path).read_text(encoding='utf-8')
+        if path.endswith('.txt'):
+            # Первая строка — название, остальные — ингредиенты.
+            name, _, lines = content.strip().partition('\n')
+            return [draft_from_lines(lines.splitlines(), index,
+                                     name=name.strip())]
+        return [draft_from_jsonld(recipe, index)
+                for recipe in load_jsonld(content)]
+
+    def save_batch(self, batch, author_id):
+        saved = len(save_drafts(batch, author_id))
+        self.created += saved
+        self.skipped += len(batch) - saved
+
+    def handle(self, *args, **options):
+        author = User.objects.filter(email=options['author']).first()
+        if author is None:
+            raise CommandError(f'Автор {options["author"]} не найден')
+
+        index = IngredientIndex.from_catalogue()
+        self.created = self.skipped = 0
+        batch = []
+        for path in options['paths']:
+            for draft in self.read_drafts(path, index):
+                for line in draft.unresolved:
+                    self.stderr.write(
+                        f'{path}: «{draft.name}»: не распознано «{line}»')
+                batch.append(draft)
+                if len(batch) >= options['batch_size']:
+                    self.save_batch(batch, author.id)
+                    batch = []
+        if batch:
+            self.save_batch(batch, author.id)
+
+        invalidate_author_profiles(author.id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершён: создано рецептов {self.created}, '
+            f'пропущено {self.skipped}'
+        ))
@@ -0,0 +1,132 @@
+import csv
+from itertools import groupby
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.precompressed import bump_catalogue_version
+from api.profiles import invalidate_author_profiles
+from core import events
+from recipes.admin import CSV_HEADER
+from recipes.importers import IMPORT_SOURCE
+from recipes.models import Ingredient, Recipe, RecipeComponent
+from recipes.nutrition import recompute_totals
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Импорт рецептов из CSV, выгруженного действием в админке'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Путь к CSV файлу')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Число рецептов в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+        }
+        self.authors = {}
+        self.created = self.skipped = 0
+
+        with open(options['path'], encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            missing = set(CSV_HEADER) - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(
+                    f'В файле нет колонок: {", ".join(sorted(missing))}')
+
+            batch = []
+            for _, rows in groupby(reader, key=lambda row: row['id']):
+                batch.append(list(rows))
+                if len(batch) >= options['batch_size']:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершён: создано рецептов {self.created}, '
+            f'пропущено {self.skipped}'
+        ))
+
+    def resolve_authors(self, emails):
+        missing = set(emails) - set(self.authors)
+        if missing:
+            self.authors.update(
+                User.objects.filter(email__in=missing).values_list(
+                    'email', 'id')
+            )
+
+    def resolve_ingredients(self, keys):
+        missing = set(keys) - set(self.ingredients)
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=unit)
+             for name, unit in missing],
+            ignore_conflicts=True
+        )
+        transaction.on_commit(lambda: bump_catalogue_version('ingredients'))
+        names = {name for name, _ in missing}
+        self.ingredients.update(
+            ((name, unit), pk) for pk, name, unit in
+            Ingredient.objects.filter(name__in=names).values_list(
+                'id', 'name', 'measurement_unit')
+        )
+
+    @transaction.atomic
+    def import_batch(self, batch):
+        self.resolve_authors(rows[0]['author_email'] for rows in batch)
+        self.resolve_ingredients(
+            (row['ingredient'], row['unit']) for rows in batch for row in rows)
+
+        recipes, components = [], []
+        for rows in batch:
+            first = rows[0]
+            author_id = self.authors.get(first['author_email'])
+            if author_id is None:
+                self.stderr.write(
+                    f'Рецепт {first["id"]}: автор '
+                    f'{first["author_email"]} не найден')
+                self.skipped += 1
+                continue
+            recipes.append(Recipe(
+                name=first['name'],
+                text=first['text'],
+                author_id=author_id,
+                cooking_time=int(first['cooking_time']),
+                image=first['image'],
+            ))
+            components.append({
+                self.ingredients[row['ingredient'], row['unit']]:
+                    int(row['amount'])
+                for row in rows
+            })
+
+        Recipe.objects.bulk_create(recipes)
+        RecipeComponent.objects.bulk_create([
+            RecipeComponent(recipe=recipe, ingredient_id=ingredient_id,
+                            amount=amount)
+            for recipe, amounts in zip(recipes, components)
+            for ingredient_id, amount in amounts.items()
+        ])
+        recompute_totals([recipe.id for recipe in recipes])
+        events.record_events(
+            Recipe, events.CREATED,
+            [{'id': recipe.id, 'author': recipe.author_id,
+              'source': IMPORT_SOURCE}
+             for recipe in recipes]
+        )
+        events.record_events(
+            RecipeComponent, events.UPDATED,
+            [{'recipe': recipe.id, 'ingredients': list(amounts)}
+             for recipe, amounts in zip(recipes, components)]
+        )
+        invalidate_author_profiles(*{recipe.author_id for recipe in recipes})
+        self.created += len(recipes)
@@ -0,0 +1,86 @@
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Ingredient, RecipeComponent
+from recipes.nutrition import recompute_totals
+
+FIELDS = ('calories', 'proteins', 'fats', 'carbohydrates', 'price')
+# data/nutrition.csv покрывает базовые продукты каталога: КБЖУ по
+# справочным таблицам состава продуктов, цены — средние розничные в
+# рублях. Рецепты с ингредиентами вне файла остаются без итогов.
+# Как в setup_initial_data: каталог data/ смонтирован в /app/data.
+LOCATIONS = (
+    '/app/data/nutrition.csv',
+    './data/nutrition.csv',
+    '../data/nutrition.csv',
+    '../../data/nutrition.csv',
+)
+
+
+class Command(BaseCommand):
+    help = ('Загрузка пищевой ценности и цен ингредиентов '
+            '(на единицу измерения) из CSV или JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=str,
+            help='Путь к файлу с колонками name, measurement_unit, '
+                 + ', '.join(FIELDS) + ' (по умолчанию data/nutrition.csv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки при обновлении',
+        )
+
+    def read_rows(self, path):
+        with open(path, encoding='utf-8') as file:
+            if path.endswith('.json'):
+                return json.load(file)
+            return list(csv.DictReader(file))
+
+    def handle(self, *args, **options):
+        locations = (options['path'],) if options['path'] else LOCATIONS
+        csv_path = next(
+            (path for path in locations if os.path.exists(path)), None)
+        if csv_path is None:
+            raise CommandError(
+                f'Файл не найден: {", ".join(locations)}. '
+                'Укажите путь через --path.')
+
+        ingredients = {
+            (item.name, item.measurement_unit): item
+            for item in Ingredient.objects.all()
+        }
+        changed = []
+        for row in self.read_rows(csv_path):
+            item = ingredients.get(
+                (row.get('name', '').strip(),
+                 row.get('measurement_unit', '').strip()))
+            if item is None:
+                continue
+            for field in FIELDS:
+                value = row.get(field)
+                setattr(item, field,
+                        None if value in (None, '') else value)
+            changed.append(item)
+
+        Ingredient.objects.bulk_update(
+            changed, FIELDS, batch_size=options['batch_size'])
+
+        recipe_ids = list(RecipeComponent.objects.filter(
+            ingredient__in=changed
+        ).values_list('recipe_id', flat=True).distinct())
+        batch_size = options['batch_size']
+        for start in range(0, len(recipe_ids), batch_size):
+            recompute_totals(recipe_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено ингредиентов: {len(changed)}, '
+            f'пересчитано рецептов: {len(recipe_ids)}'
+        ))
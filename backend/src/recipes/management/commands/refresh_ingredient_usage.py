@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes import usage
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт популярности ингредиентов: всего и за последние '
+            'INGREDIENT_USAGE_WINDOW дней')
+
+    def handle(self, *args, **options):
+        total = usage.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярность пересчитана для {total} ингредиентов'))
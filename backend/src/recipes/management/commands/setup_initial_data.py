@@ -1,4 +1,5 @@
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
 from recipes.models import Ingredient
 import csv
 import os
@@ -47,3 +48,9 @@ class Command(BaseCommand):
                 f'Ингредиенты загружены: создано {created}, уже существовало {existed}'
             )
         )
+        # Пищевая ценность и цены из data/nutrition.csv рядом с каталогом.
+        try:
+            call_command('load_nutrition', stdout=self.stdout)
+        except CommandError as error:
+            self.stdout.write(self.style.WARNING(
+                f'Пищевая ценность не загружена: {error}'))
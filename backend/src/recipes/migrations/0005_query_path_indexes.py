@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_nutrition_and_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='grocerylist',
+            index=models.Index(fields=['user', '-added_at'], name='grocery_user_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipecomponent',
+            index=models.Index(fields=['recipe'], include=('ingredient', 'amount'), name='component_recipe_covering_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfavorite',
+            index=models.Index(fields=['user', '-added_at'], name='favorite_user_added_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_query_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cooking_time'], name='recipe_cooking_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipecomponent',
+            index=models.Index(fields=['ingredient', 'recipe'], name='component_ingredient_idx'),
+        ),
+    ]
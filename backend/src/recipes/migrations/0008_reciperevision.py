@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_mealplan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата изменения')),
+                ('changes', models.JSONField(default=dict, verbose_name='Изменения')),
+                ('edits', models.PositiveIntegerField(default=1, verbose_name='Правок')),
+                ('editor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recipe_revisions', to=settings.AUTH_USER_MODEL, verbose_name='Автор изменения')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Версия рецепта',
+                'verbose_name_plural': 'Версии рецептов',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['recipe', '-id'], name='revision_recipe_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:59
+
+from django.db import migrations, models
+
+# Строки без своих зависимых: каскад на стороне базы для них безопасен
+# и страхует от сирот при удалении мимо ORM. Django по-прежнему удаляет
+# их сам; пересоздание внешнего ключа через AlterField сбросит каскад.
+CASCADE_TABLES = (
+    'recipes_recipecomponent',
+    'recipes_userfavorite',
+    'recipes_grocerylist',
+    'recipes_mealplan',
+    'recipes_reciperevision',
+    'recipes_recipesimilarity',
+    'users_subscription',
+)
+PARENT_TABLES = ('recipes_recipe', 'users_user')
+
+ALTER_FOREIGN_KEYS = '''
+DO $$
+DECLARE fk record;
+BEGIN
+    FOR fk IN
+        SELECT conrelid::regclass AS tbl, conname,
+               pg_get_constraintdef(oid) AS def
+        FROM pg_constraint
+        WHERE contype = 'f'
+          AND conrelid::regclass::text IN ({tables})
+          AND confrelid::regclass::text IN ({parents})
+          AND confdeltype = '{action}'
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I, '
+                       'ADD CONSTRAINT %I %s', fk.tbl, fk.conname,
+                       fk.conname, {definition});
+    END LOOP;
+END $$;
+'''
+
+
+def set_on_delete(schema_editor, cascade):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if cascade:
+        # ON DELETE должен стоять до DEFERRABLE.
+        definition = ("regexp_replace(fk.def, '( DEFERRABLE|$)', "
+                      "' ON DELETE CASCADE\\1')")
+        action = 'a'
+    else:
+        definition = "replace(fk.def, ' ON DELETE CASCADE', '')"
+        action = 'c'
+    schema_editor.execute(ALTER_FOREIGN_KEYS.format(
+        tables=', '.join(f"'{table}'" for table in CASCADE_TABLES),
+        parents=', '.join(f"'{table}'" for table in PARENT_TABLES),
+        action=action,
+        definition=definition,
+    ), params=None)
+
+
+def add_db_cascade(apps, schema_editor):
+    set_on_delete(schema_editor, cascade=True)
+
+
+def remove_db_cascade(apps, schema_editor):
+    set_on_delete(schema_editor, cascade=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_reciperevision'),
+        ('users', '0003_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='recipe_deleted_idx'),
+        ),
+        migrations.RunPython(add_db_cascade, remove_db_cascade),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientUsage',
+            fields=[
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='usage', serialize=False, to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('recipes_total', models.PositiveIntegerField(default=0, verbose_name='Рецептов всего')),
+                ('recipes_recent', models.PositiveIntegerField(default=0, verbose_name='Рецептов за последние дни')),
+                ('refreshed', models.DateTimeField(verbose_name='Дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Популярность ингредиента',
+                'verbose_name_plural': 'Популярность ингредиентов',
+                'indexes': [models.Index(fields=['-recipes_total'], name='usage_total_idx'), models.Index(fields=['-recipes_recent'], name='usage_recent_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_soft_delete'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0010_ingredientusage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationInbox',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_inbox', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('unread', models.PositiveIntegerField(default=0, verbose_name='Непрочитанных')),
+                ('digest_mode', models.BooleanField(default=False, verbose_name='Сводка вместо отдельных уведомлений')),
+            ],
+            options={
+                'verbose_name': 'Ящик уведомлений',
+                'verbose_name_plural': 'Ящики уведомлений',
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Новых рецептов')),
+                ('is_digest', models.BooleanField(default=False, verbose_name='Сводка')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Уведомление',
+                'verbose_name_plural': 'Уведомления',
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['user', '-created'], name='notification_user_created_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_digest', True), ('is_read', False)), fields=('user',), name='unique_unread_digest'),
+        ),
+    ]
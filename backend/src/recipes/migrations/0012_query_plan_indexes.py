@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_notifications'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ingredientusage',
+            name='usage_total_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ingredientusage',
+            name='usage_recent_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='recipecomponent',
+            name='component_recipe_covering_idx',
+        ),
+        migrations.AlterField(
+            model_name='recipecomponent',
+            name='ingredient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_usage', to='recipes.ingredient', verbose_name='Продукт'),
+        ),
+        migrations.AlterField(
+            model_name='recipecomponent',
+            name='recipe',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='components', to='recipes.recipe', verbose_name='В рецепте'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredientusage',
+            index=models.Index(fields=['-recipes_total', 'ingredient'], name='usage_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredientusage',
+            index=models.Index(fields=['-recipes_recent', 'ingredient'], name='usage_recent_idx'),
+        ),
+    ]
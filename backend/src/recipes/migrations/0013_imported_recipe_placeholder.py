@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:30
+
+from django.db import migrations
+
+
+def set_placeholder(apps, schema_editor):
+    from recipes.importers import placeholder_image
+
+    Recipe = apps.get_model('recipes', 'Recipe')
+    imported = Recipe.objects.filter(image='')
+    if imported.exists():
+        imported.update(image=placeholder_image())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_placeholder, migrations.RunPython.noop),
+    ]
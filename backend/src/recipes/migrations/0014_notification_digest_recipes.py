@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_imported_recipe_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='digest_recipes',
+            field=models.ManyToManyField(blank=True, related_name='+', to='recipes.recipe', verbose_name='Рецепты сводки'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:42
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# AlterField пересоздаёт внешние ключи без ON DELETE CASCADE, который
+# ставит 0009_soft_delete; после него каскад возвращается.
+soft_delete = import_module('recipes.migrations.0009_soft_delete')
+
+
+def add_covering_index(apps, schema_editor):
+    # SQLite не поддерживает INCLUDE, индекс нужен только PostgreSQL.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS component_recipe_covering_idx '
+        'ON recipes_recipecomponent (recipe_id) '
+        'INCLUDE (ingredient_id, amount)')
+
+
+def remove_covering_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'DROP INDEX IF EXISTS component_recipe_covering_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_notification_digest_recipes'),
+    ]
+
+    operations = [
+        # При откате AlterField снова сбросит каскад: вернуть его последним.
+        migrations.RunPython(
+            migrations.RunPython.noop, soft_delete.add_db_cascade),
+        migrations.AlterField(
+            model_name='recipecomponent',
+            name='ingredient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_usage', to='recipes.ingredient', verbose_name='Продукт'),
+        ),
+        migrations.AlterField(
+            model_name='recipecomponent',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='components', to='recipes.recipe', verbose_name='В рецепте'),
+        ),
+        migrations.RunPython(
+            soft_delete.add_db_cascade, migrations.RunPython.noop),
+        migrations.RunPython(add_covering_index, remove_covering_index),
+    ]
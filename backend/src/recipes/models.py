@@ -1,12 +1,21 @@
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.db.models import UniqueConstraint, CheckConstraint, Q, F
+from core.softdelete import SoftDeleteModel
 from users.models import User
 
 
 class Ingredient(models.Model):
     name = models.CharField('Наименование', max_length=128)
     measurement_unit = models.CharField('Единица измерения', max_length=64)
+    # Пищевая ценность и цена указываются на одну единицу измерения.
+    calories = models.FloatField('Калорийность, ккал', null=True, blank=True)
+    proteins = models.FloatField('Белки, г', null=True, blank=True)
+    fats = models.FloatField('Жиры, г', null=True, blank=True)
+    carbohydrates = models.FloatField('Углеводы, г', null=True, blank=True)
+    price = models.DecimalField(
+        'Цена', max_digits=10, decimal_places=4, null=True, blank=True)
 
     class Meta:
         verbose_name = 'Ингредиент'
@@ -24,7 +33,36 @@ class Ingredient(models.Model):
         return f'{self.name} ({self.measurement_unit})'
 
 
-class Recipe(models.Model):
+class IngredientUsage(models.Model):
+    """Число рецептов с ингредиентом; пересчитывается recipes.usage."""
+    ingredient = models.OneToOneField(
+        Ingredient,
+        primary_key=True,
+        related_name='usage',
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+    )
+    recipes_total = models.PositiveIntegerField('Рецептов всего', default=0)
+    recipes_recent = models.PositiveIntegerField(
+        'Рецептов за последние дни', default=0)
+    refreshed = models.DateTimeField('Дата пересчёта')
+
+    class Meta:
+        verbose_name = 'Популярность ингредиента'
+        verbose_name_plural = 'Популярность ингредиентов'
+        indexes = [
+            # Второй ключ повторяет порядок выдачи popular целиком.
+            models.Index(fields=['-recipes_total', 'ingredient'],
+                         name='usage_total_idx'),
+            models.Index(fields=['-recipes_recent', 'ingredient'],
+                         name='usage_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient_id}: {self.recipes_total}'
+
+
+class Recipe(SoftDeleteModel):
     name = models.CharField('Название блюда', max_length=256, db_index=True)
     text = models.TextField('Описание процесса приготовления')
     author = models.ForeignKey(
@@ -48,12 +86,36 @@ class Recipe(models.Model):
     )
     pub_date = models.DateTimeField(
         'Дата публикации', auto_now_add=True, db_index=True)
+    # Итоги по компонентам, пересчитываются в recipes.nutrition.
+    total_calories = models.FloatField(
+        'Калорийность, ккал', null=True, blank=True, editable=False)
+    total_proteins = models.FloatField(
+        'Белки, г', null=True, blank=True, editable=False)
+    total_fats = models.FloatField(
+        'Жиры, г', null=True, blank=True, editable=False)
+    total_carbohydrates = models.FloatField(
+        'Углеводы, г', null=True, blank=True, editable=False)
+    total_price = models.DecimalField(
+        'Стоимость', max_digits=12, decimal_places=2,
+        null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
         default_related_name = 'recipe_entries'
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='recipe_author_pub_date_idx'),
+            models.Index(fields=['cooking_time'],
+                         name='recipe_cooking_time_idx'),
+            models.Index(fields=['total_calories'],
+                         name='recipe_total_calories_idx'),
+            models.Index(fields=['total_price'],
+                         name='recipe_total_price_idx'),
+            models.Index(fields=['deleted_at'], name='recipe_deleted_idx',
+                         condition=Q(deleted_at__isnull=False)),
+        ]
 
     def __str__(self):
         return f'"{self.name}" от {self.author.username}'
@@ -81,6 +143,15 @@ class RecipeComponent(models.Model):
     class Meta:
         verbose_name = 'Компонент рецепта'
         verbose_name_plural = 'Компоненты рецептов'
+        # На PostgreSQL состав страницы рецептов читается только из
+        # индекса (recipe) INCLUDE (ingredient, amount); он создаётся
+        # миграцией 0015: SQLite отбросил бы INCLUDE и продублировал
+        # индекс внешнего ключа.
+        indexes = [
+            # Поиск рецептов по ингредиенту в фильтрах.
+            models.Index(fields=['ingredient', 'recipe'],
+                         name='component_ingredient_idx'),
+        ]
         constraints = [
             UniqueConstraint(
                 fields=['recipe', 'ingredient'],
@@ -114,6 +185,10 @@ class UserFavorite(models.Model):
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         ordering = ['-added_at']
+        indexes = [
+            models.Index(fields=['user', '-added_at'],
+                         name='favorite_user_added_idx'),
+        ]
         constraints = [
             UniqueConstraint(fields=['user', 'recipe'],
                              name='unique_user_favorite'),
@@ -143,6 +218,10 @@ class GroceryList(models.Model):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
         ordering = ['-added_at']
+        indexes = [
+            models.Index(fields=['user', '-added_at'],
+                         name='grocery_user_added_idx'),
+        ]
         constraints = [
             UniqueConstraint(fields=['user', 'recipe'],
                              name='unique_recipe_in_list')
@@ -150,3 +229,192 @@ class GroceryList(models.Model):
 
     def __str__(self):
         return f'{self.user.username}: "{self.recipe.name}" в списке покупок'
+
+
+class RecipeSimilarity(models.Model):
+    """Предрасчитанный ближайший сосед рецепта по совместным добавлениям."""
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='similar_recipes',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        related_name='+',
+        on_delete=models.CASCADE,
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        indexes = [
+            models.Index(fields=['recipe', '-score'],
+                         name='similarity_recipe_score_idx'),
+        ]
+        constraints = [
+            UniqueConstraint(fields=['recipe', 'similar'],
+                             name='unique_recipe_similarity'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} → {self.similar_id} ({self.score:.3f})'
+
+
+class MealPlan(models.Model):
+    """Рецепт, запланированный на приём пищи в конкретный день."""
+    BREAKFAST = 'breakfast'
+    LUNCH = 'lunch'
+    DINNER = 'dinner'
+    SNACK = 'snack'
+    SLOTS = (
+        (BREAKFAST, 'Завтрак'),
+        (LUNCH, 'Обед'),
+        (DINNER, 'Ужин'),
+        (SNACK, 'Перекус'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        related_name='meal_plans',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+    )
+    date = models.DateField('Дата')
+    slot = models.CharField('Приём пищи', max_length=16, choices=SLOTS)
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='in_meal_plans',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    servings = models.PositiveSmallIntegerField(
+        'Порций',
+        default=1,
+        validators=[MinValueValidator(
+            1, message='Требуется хотя бы 1 порция')],
+    )
+
+    class Meta:
+        verbose_name = 'План питания'
+        verbose_name_plural = 'Планы питания'
+        ordering = ['date', 'slot']
+        constraints = [
+            UniqueConstraint(fields=['user', 'date', 'slot'],
+                             name='unique_meal_plan_slot'),
+        ]
+
+    def __str__(self):
+        return (f'{self.user.username}: {self.date} '
+                f'{self.get_slot_display()} — "{self.recipe.name}"')
+
+
+class RecipeRevision(models.Model):
+    """Изменение рецепта: только изменённые поля и компоненты.
+
+    changes = {'fields': {поле: [было, стало]},
+               'components': {id ингредиента: [было, стало]}};
+    отсутствующий компонент обозначается null.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='revisions',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    editor = models.ForeignKey(
+        User,
+        related_name='recipe_revisions',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Автор изменения',
+    )
+    created = models.DateTimeField('Дата изменения', auto_now_add=True)
+    changes = models.JSONField('Изменения', default=dict)
+    # Сколько правок объединено в эту запись при сжатии истории.
+    edits = models.PositiveIntegerField('Правок', default=1)
+
+    class Meta:
+        verbose_name = 'Версия рецепта'
+        verbose_name_plural = 'Версии рецептов'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['recipe', '-id'],
+                         name='revision_recipe_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'"{self.recipe.name}" от {self.created:%d.%m.%Y %H:%M}'
+
+
+class NotificationInbox(models.Model):
+    """Состояние уведомлений пользователя: счётчик непрочитанных и режим."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='notification_inbox',
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+    )
+    # Поддерживается рассылкой и отметками о прочтении, без COUNT(*).
+    unread = models.PositiveIntegerField('Непрочитанных', default=0)
+    digest_mode = models.BooleanField(
+        'Сводка вместо отдельных уведомлений', default=False)
+
+    class Meta:
+        verbose_name = 'Ящик уведомлений'
+        verbose_name_plural = 'Ящики уведомлений'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread}'
+
+
+class Notification(models.Model):
+    """Уведомление о новом рецепте автора из подписок.
+
+    В режиме сводки у пользователя одно непрочитанное уведомление
+    is_digest, в котором count растёт, а recipe — последний рецепт;
+    все рецепты сводки перечислены в digest_recipes.
+    """
+    user = models.ForeignKey(
+        User,
+        related_name='notifications',
+        on_delete=models.CASCADE,
+        verbose_name='Получатель',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='notifications',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    count = models.PositiveIntegerField('Новых рецептов', default=1)
+    digest_recipes = models.ManyToManyField(
+        Recipe,
+        related_name='+',
+        blank=True,
+        verbose_name='Рецепты сводки',
+    )
+    is_digest = models.BooleanField('Сводка', default=False)
+    is_read = models.BooleanField('Прочитано', default=False)
+    created = models.DateTimeField('Дата', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        ordering = ['-created']
+        indexes = [
+            models.Index(fields=['user', '-created'],
+                         name='notification_user_created_idx'),
+        ]
+        constraints = [
+            UniqueConstraint(fields=['user'],
+                             condition=Q(is_digest=True, is_read=False),
+                             name='unique_unread_digest'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: "{self.recipe.name}" ×{self.count}'
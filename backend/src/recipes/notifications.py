@@ -0,0 +1,112 @@
+"""Рассылка уведомлений подписчикам о новых рецептах.
+
+Рассылка идёт задачей notify_subscribers вне запроса создания рецепта:
+подписчики читаются по ключу пачками по NOTIFICATIONS_CHUNK_SIZE, каждая
+пачка — своя транзакция с bulk_create уведомлений и одним UPDATE
+счётчиков непрочитанных в NotificationInbox. Пользователям в режиме
+сводки вместо новой записи увеличивается count их непрочитанной сводки.
+Повтор задачи после сбоя не дублирует уведомления: получатели, у которых
+уведомление о рецепте уже есть или рецепт уже учтён в сводке
+(digest_recipes), пропускаются.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from users.models import Subscription
+from .models import Notification, NotificationInbox, Recipe
+
+NOTIFY_TASK = 'notify_subscribers'
+
+
+def chunk_size():
+    return getattr(settings, 'NOTIFICATIONS_CHUNK_SIZE', 1000)
+
+
+def schedule(recipe_ids):
+    from core import jobs
+
+    for recipe_id in recipe_ids:
+        jobs.enqueue(NOTIFY_TASK, {'recipe': recipe_id},
+                     dedup_key=f'{NOTIFY_TASK}:{recipe_id}')
+
+
+def subscriber_chunks(author_id, size):
+    """Id живых подписчиков автора пачками, по возрастанию id."""
+    subscribers = Subscription.objects.filter(
+        author_id=author_id, user__deleted_at__isnull=True,
+    ).order_by('user_id').values_list('user_id', flat=True)
+    last = 0
+    while True:
+        chunk = list(subscribers.filter(user_id__gt=last)[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+@transaction.atomic
+def notify_chunk(recipe, user_ids):
+    """Уведомляет пачку подписчиков; возвращает число новых уведомлений."""
+    NotificationInbox.objects.bulk_create(
+        [NotificationInbox(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    done = set(Notification.objects.filter(
+        recipe=recipe, user_id__in=user_ids).values_list('user_id', flat=True))
+    # Рецепт сводки мог смениться задачей другого автора.
+    done.update(Notification.digest_recipes.through.objects.filter(
+        recipe=recipe, notification__user_id__in=user_ids,
+    ).values_list('notification__user_id', flat=True))
+    pending = [user_id for user_id in user_ids if user_id not in done]
+    digest = set(NotificationInbox.objects.filter(
+        user_id__in=pending, digest_mode=True,
+    ).values_list('user_id', flat=True))
+
+    now = timezone.now()
+    collapsed = set(Notification.objects.select_for_update().filter(
+        user_id__in=digest, is_digest=True, is_read=False,
+    ).values_list('user_id', flat=True))
+    Notification.objects.filter(
+        user_id__in=collapsed, is_digest=True, is_read=False,
+    ).update(count=F('count') + 1, recipe=recipe, created=now)
+
+    created = Notification.objects.bulk_create([
+        Notification(user_id=user_id, recipe=recipe, created=now,
+                     is_digest=user_id in digest)
+        for user_id in pending if user_id not in collapsed
+    ])
+    Notification.digest_recipes.through.objects.bulk_create([
+        Notification.digest_recipes.through(
+            notification_id=notification_id, recipe=recipe)
+        for notification_id in Notification.objects.filter(
+            user_id__in=digest, is_digest=True, is_read=False,
+        ).values_list('id', flat=True)
+    ], ignore_conflicts=True)
+    NotificationInbox.objects.filter(
+        user_id__in=[notification.user_id for notification in created],
+    ).update(unread=F('unread') + 1)
+    return len(created)
+
+
+def notify_subscribers(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None:
+        return 0
+    return sum(notify_chunk(recipe, chunk)
+               for chunk in subscriber_chunks(recipe.author_id, chunk_size()))
+
+
+@transaction.atomic
+def mark_read(user_id, notification_ids=None):
+    """Отмечает уведомления прочитанными и уменьшает счётчик."""
+    unread = Notification.objects.filter(user_id=user_id, is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(id__in=notification_ids)
+    marked = unread.update(is_read=True)
+    if marked:
+        NotificationInbox.objects.filter(user_id=user_id).update(
+            unread=Greatest(F('unread') - marked, 0))
+    return marked
@@ -0,0 +1,46 @@
+"""Пищевая ценность и стоимость рецептов по их компонентам.
+
+Итог считается, только если значение известно для всех ингредиентов
+рецепта; иначе он остаётся пустым (NULL), а не частичной суммой, и
+фильтры по итогам такой рецепт не находят.
+"""
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, When
+
+from .models import Recipe, RecipeComponent
+
+# Поле итога рецепта -> поле ингредиента на единицу измерения.
+TOTALS = {
+    'total_calories': 'calories',
+    'total_proteins': 'proteins',
+    'total_fats': 'fats',
+    'total_carbohydrates': 'carbohydrates',
+    'total_price': 'price',
+}
+
+
+def total_expression(field, output_field):
+    components = RecipeComponent.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe')
+    return Subquery(
+        components.annotate(
+            missing=Count('pk', filter=Q(
+                **{f'ingredient__{field}__isnull': True})),
+            total=Case(
+                When(missing=0, then=Sum(
+                    F('amount') * F(f'ingredient__{field}'),
+                    output_field=output_field,
+                )),
+                output_field=output_field,
+            ),
+        ).values('total'),
+        output_field=output_field,
+    )
+
+
+def recompute_totals(recipe_ids):
+    """Пересчитывает итоги рецептов одним UPDATE."""
+    return Recipe.objects.filter(pk__in=recipe_ids).update(**{
+        total: total_expression(field, Recipe._meta.get_field(total))
+        for total, field in TOTALS.items()
+    })
@@ -0,0 +1,148 @@
+"""Единицы измерения и агрегирование количеств ингредиентов.
+
+Количества приводятся к базовой единице своей размерности (граммы,
+миллилитры, штуки), складываются и выводятся в удобной единице.
+Единицы, которых нет в таблице, остаются как есть и складываются
+только сами с собой.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import NamedTuple
+
+MASS = 'mass'
+VOLUME = 'volume'
+COUNT = 'count'
+
+
+class Unit(NamedTuple):
+    name: str
+    dimension: str
+    factor: Decimal
+
+
+UNITS = {
+    unit.name: unit for unit in (
+        Unit('мг', MASS, Decimal('0.001')),
+        Unit('г', MASS, Decimal('1')),
+        Unit('кг', MASS, Decimal('1000')),
+        Unit('капля', VOLUME, Decimal('0.05')),
+        Unit('мл', VOLUME, Decimal('1')),
+        Unit('ч. л.', VOLUME, Decimal('5')),
+        Unit('ст. л.', VOLUME, Decimal('15')),
+        Unit('стакан', VOLUME, Decimal('250')),
+        Unit('л', VOLUME, Decimal('1000')),
+        Unit('шт.', COUNT, Decimal('1')),
+    )
+}
+
+ALIASES = {
+    'гр': 'г', 'гр.': 'г', 'грамм': 'г', 'граммов': 'г', 'грамма': 'г',
+    'кг.': 'кг', 'килограмм': 'кг', 'килограмма': 'кг',
+    'мл.': 'мл', 'миллилитров': 'мл',
+    'л.': 'л', 'литр': 'л', 'литра': 'л', 'литров': 'л',
+    'ч.л.': 'ч. л.', 'чайная ложка': 'ч. л.', 'чайные ложки': 'ч. л.',
+    'ст.л.': 'ст. л.', 'столовая ложка': 'ст. л.',
+    'столовые ложки': 'ст. л.',
+    'капли': 'капля', 'капель': 'капля',
+    'стакана': 'стакан', 'стаканов': 'стакан',
+    'шт': 'шт.', 'штука': 'шт.', 'штуки': 'шт.', 'штук': 'шт.',
+}
+
+BASE_UNITS = {MASS: UNITS['г'], VOLUME: UNITS['мл'], COUNT: UNITS['шт.']}
+
+# Единицы для вывода: первая, в которой значение не меньше единицы.
+DISPLAY_UNITS = {
+    MASS: (UNITS['кг'], UNITS['г']),
+    VOLUME: (UNITS['л'], UNITS['мл']),
+    COUNT: (UNITS['шт.'],),
+}
+
+PRECISION = Decimal('0.01')
+
+
+class Quantity(NamedTuple):
+    name: str
+    amount: Decimal
+    unit: str
+
+    def __str__(self):
+        return f'{self.name} ({self.unit}) — {format_amount(self.amount)}'
+
+
+def get_unit(name):
+    """Возвращает единицу по названию или синониму, либо None."""
+    key = ' '.join(name.lower().split())
+    return UNITS.get(ALIASES.get(key, key))
+
+
+def to_base(amount, unit_name):
+    """Переводит количество в базовую единицу размерности.
+
+    Возвращает пару (количество, ключ размерности); для неизвестных
+    единиц ключом служит само название единицы.
+    """
+    unit = get_unit(unit_name)
+    if unit is None:
+        return Decimal(amount), unit_name
+    return Decimal(amount) * unit.factor, unit.dimension
+
+
+def convert(amount, from_unit, to_unit):
+    """Переводит количество между единицами одной размерности.
+
+    Возвращает None, если единицы несовместимы.
+    """
+    if from_unit == to_unit:
+        return Decimal(amount)
+    source, target = get_unit(from_unit), get_unit(to_unit)
+    if not (source and target) or source.dimension != target.dimension:
+        return None
+    return Decimal(amount) * source.factor / target.factor
+
+
+def humanize(amount, dimension):
+    """Подбирает единицу вывода для количества в базовых единицах."""
+    if dimension not in DISPLAY_UNITS:
+        return amount, dimension
+    for unit in DISPLAY_UNITS[dimension]:
+        if amount >= unit.factor:
+            return amount / unit.factor, unit.name
+    return amount, BASE_UNITS[dimension].name
+
+
+def format_amount(amount):
+    amount = Decimal(amount).quantize(PRECISION, rounding=ROUND_HALF_UP)
+    return f'{amount.normalize():f}'
+
+
+def aggregate(rows, name_key='ingredient__name',
+              unit_key='ingredient__measurement_unit',
+              amount_key='amount', factor=1):
+    """Сводит строки вида values(...).annotate(amount=Sum(...)).
+
+    Строки, уже сгруппированные базой по названию и единице, за один
+    проход переводятся в базовые единицы и суммируются по паре
+    (название, размерность). factor масштабирует результат, например
+    по числу порций. Результат отсортирован по названию.
+    """
+    factor = Decimal(factor)
+    totals = {}
+    for row in rows:
+        amount, dimension = to_base(row[amount_key] or 0, row[unit_key])
+        key = (row[name_key], dimension)
+        totals[key] = totals.get(key, 0) + amount
+
+    quantities = []
+    for (name, dimension), amount in totals.items():
+        amount, unit = humanize(amount * factor, dimension)
+        quantities.append(Quantity(name, amount, unit))
+    quantities.sort(key=lambda quantity: (quantity.name, quantity.unit))
+    return quantities
+
+
+def scale(quantities, factor):
+    """Масштабирует уже сведённые количества."""
+    return aggregate(
+        ({'name': q.name, 'unit': q.unit, 'amount': q.amount}
+         for q in quantities),
+        name_key='name', unit_key='unit', factor=factor
+    )
@@ -0,0 +1,157 @@
+"""Рекомендации «с этим рецептом также добавляют».
+
+Матрица взаимодействий пользователь × рецепт строится из избранного и
+списков покупок: рецепт и там, и там — одно взаимодействие, на
+пользователя не больше MAX_ITEMS_PER_USER последних. Сходство рецептов —
+косинусная мера по столбцам этой разреженной матрицы:
+co(i, j) / sqrt(n(i) * n(j)), где co — число пользователей, добавивших
+оба рецепта, а n — число пользователей рецепта в той же матрице. Для
+каждого рецепта хранится TOP_K соседей в RecipeSimilarity, поэтому
+выдача рекомендаций — это чтение из этой таблицы.
+"""
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import GroceryList, RecipeSimilarity, UserFavorite
+
+INTERACTION_MODELS = (UserFavorite, GroceryList)
+
+# Пользователи с очень длинной историей почти не влияют на сходство,
+# но дают квадратичное число пар; учитываются их последние добавления.
+MAX_ITEMS_PER_USER = 200
+# Рецептов на один запрос подсчёта: ограничивает число параметров.
+COUNT_CHUNK_SIZE = 500
+
+
+def top_k():
+    return getattr(settings, 'RECOMMENDATIONS_TOP_K', 20)
+
+
+def interactions_sql(recipe_ids=None):
+    """SQL пар (user_id, recipe_id), по которым считается сходство.
+
+    Рецепт и в избранном, и в списке покупок даёт одну пару; у каждого
+    пользователя берутся MAX_ITEMS_PER_USER пар с самыми поздними
+    добавлениями. С recipe_ids читаются только пользователи, добавившие
+    хотя бы один из этих рецептов (подзапросом, без списка id).
+    """
+    tables = [connection.ops.quote_name(model._meta.db_table)
+              for model in INTERACTION_MODELS]
+    where, params = '', []
+    if recipe_ids is not None:
+        placeholders = ', '.join(['%s'] * len(recipe_ids))
+        users = ' UNION '.join(
+            f'SELECT user_id FROM {table} WHERE recipe_id IN ({placeholders})'
+            for table in tables)
+        where = f' WHERE user_id IN ({users})'
+        params = list(recipe_ids) * len(tables) * len(tables)
+    links = ' UNION ALL '.join(
+        f'SELECT user_id, recipe_id, added_at FROM {table}{where}'
+        for table in tables)
+    sql = (
+        'SELECT user_id, recipe_id FROM ('
+        'SELECT user_id, recipe_id, ROW_NUMBER() OVER ('
+        'PARTITION BY user_id ORDER BY MAX(added_at) DESC, recipe_id'
+        ') AS position '
+        f'FROM ({links}) AS links GROUP BY user_id, recipe_id'
+        ') AS ranked WHERE position <= %s'
+    )
+    return sql, params + [MAX_ITEMS_PER_USER]
+
+
+def load_interactions(recipe_ids=None):
+    """Возвращает {user_id: {recipe_id, ...}}."""
+    interactions = defaultdict(set)
+    with connection.cursor() as cursor:
+        cursor.execute(*interactions_sql(recipe_ids))
+        for rows in iter(lambda: cursor.fetchmany(10000), []):
+            for user_id, recipe_id in rows:
+                interactions[user_id].add(recipe_id)
+    return interactions
+
+
+def item_counts(recipe_ids):
+    """Число пользователей, у которых рецепт входит в учитываемые пары."""
+    counts = Counter()
+    recipe_ids = list(recipe_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(recipe_ids), COUNT_CHUNK_SIZE):
+            chunk = recipe_ids[start:start + COUNT_CHUNK_SIZE]
+            sql, params = interactions_sql(chunk)
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'SELECT recipe_id, COUNT(*) FROM ({sql}) AS pairs '
+                f'WHERE recipe_id IN ({placeholders}) GROUP BY recipe_id',
+                params + chunk)
+            counts.update(dict(cursor.fetchall()))
+    return counts
+
+
+def neighbours(co_counts, counts, limit):
+    """Отбирает limit соседей по косинусной мере."""
+    result = {}
+    for recipe_id, row in co_counts.items():
+        scored = [
+            (together / math.sqrt(counts[recipe_id] * counts[other]), other)
+            for other, together in row.items()
+        ]
+        scored.sort(reverse=True)
+        result[recipe_id] = scored[:limit]
+    return result
+
+
+@transaction.atomic
+def store(similar, replace=None):
+    """Записывает соседей; replace — рецепты, чьи списки заменяются."""
+    stale = RecipeSimilarity.objects.all()
+    if replace is not None:
+        stale = stale.filter(recipe_id__in=replace)
+    stale.delete()
+    RecipeSimilarity.objects.bulk_create(
+        [RecipeSimilarity(recipe_id=recipe_id, similar_id=other, score=score)
+         for recipe_id, scored in similar.items()
+         for score, other in scored],
+        batch_size=5000,
+    )
+
+
+def rebuild():
+    """Полный пересчёт соседей для всех рецептов."""
+    co_counts = defaultdict(Counter)
+    counts = Counter()
+    for items in load_interactions().values():
+        counts.update(items)
+        for recipe_id in items:
+            row = co_counts[recipe_id]
+            for other in items:
+                if other != recipe_id:
+                    row[other] += 1
+    similar = neighbours(co_counts, counts, top_k())
+    store(similar)
+    return len(similar)
+
+
+def refresh(recipe_ids):
+    """Пересчитывает соседей только для указанных рецептов.
+
+    Списки соседей других рецептов, в которые входят указанные,
+    обновляются при следующем полном пересчёте.
+    """
+    recipe_ids = set(recipe_ids)
+    co_counts = {recipe_id: Counter() for recipe_id in recipe_ids}
+    for items in load_interactions(recipe_ids).values():
+        for recipe_id in items & recipe_ids:
+            row = co_counts[recipe_id]
+            for other in items:
+                if other != recipe_id:
+                    row[other] += 1
+
+    candidates = set(recipe_ids)
+    for row in co_counts.values():
+        candidates.update(row)
+    similar = neighbours(co_counts, item_counts(candidates), top_k())
+    store(similar, replace=recipe_ids)
+    return len(similar)
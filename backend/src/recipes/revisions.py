@@ -0,0 +1,138 @@
+"""История изменений рецептов в виде компактных разниц.
+
+Ревизия хранит только изменённые поля и компоненты парами [было, стало],
+поэтому её размер зависит от объёма правки, а не от размера рецепта.
+При сжатии старые ревизии рецепта сливаются в одну: для каждого поля
+остаются первое «было» и последнее «стало», несущественные пары
+(вернувшиеся к исходному значению) выбрасываются.
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import RecipeComponent, RecipeRevision
+
+TRACKED_FIELDS = ('name', 'text', 'cooking_time', 'image')
+
+
+def field_value(recipe, field):
+    value = getattr(recipe, field)
+    return value.name if field == 'image' else value
+
+
+def file_digest(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.digest()
+
+
+def same_image(stored, upload):
+    """Совпадает ли загруженная картинка с уже сохранённой.
+
+    Клиент присылает картинку заново при каждой правке рецепта; такую
+    картинку не нужно ни сохранять, ни записывать в ревизию.
+    """
+    if not stored:
+        return False
+    try:
+        if stored.size != upload.size:
+            return False
+        with stored.open('rb'):
+            return file_digest(stored) == file_digest(upload)
+    except OSError:
+        return False
+
+
+def snapshot(recipe, fields, with_components):
+    """Значения полей, которые будут изменены, и состав рецепта."""
+    state = {'fields': {field: field_value(recipe, field)
+                        for field in fields if field in TRACKED_FIELDS}}
+    if with_components:
+        state['components'] = dict(RecipeComponent.objects.filter(
+            recipe=recipe).values_list('ingredient_id', 'amount'))
+    return state
+
+
+def diff_values(before, after):
+    return {
+        str(key): [before.get(key), after.get(key)]
+        for key in {*before, *after}
+        if before.get(key) != after.get(key)
+    }
+
+
+def record_revision(recipe, before, editor_id, components=None):
+    """Создаёт ревизию по снимку до правки; None, если ничего не изменилось.
+
+    components — новый состав {id ингредиента: количество}, если он
+    менялся; так состав не перечитывается из базы.
+    """
+    changes = {}
+    fields = diff_values(before['fields'], {
+        field: field_value(recipe, field) for field in before['fields']})
+    if fields:
+        changes['fields'] = fields
+    if components is not None:
+        delta = diff_values(before.get('components', {}), components)
+        if delta:
+            changes['components'] = delta
+    if not changes:
+        return None
+    return RecipeRevision.objects.create(
+        recipe=recipe, editor_id=editor_id, changes=changes)
+
+
+def merge_pairs(older, newer):
+    merged = dict(older)
+    for key, (old_value, new_value) in newer.items():
+        merged[key] = [merged[key][0] if key in merged else old_value,
+                       new_value]
+    return {key: pair for key, pair in merged.items() if pair[0] != pair[1]}
+
+
+def merge_changes(revisions):
+    """Сливает ревизии, упорядоченные от старой к новой, в одну разницу."""
+    merged = {}
+    for revision in revisions:
+        for part, pairs in revision.changes.items():
+            merged[part] = merge_pairs(merged.get(part, {}), pairs)
+    return {part: pairs for part, pairs in merged.items() if pairs}
+
+
+@transaction.atomic
+def compact_recipe(recipe_id, keep, before):
+    """Сливает ревизии рецепта старше before, кроме keep последних.
+
+    Возвращает число удалённых записей.
+    """
+    kept = RecipeRevision.objects.filter(
+        recipe_id=recipe_id).values_list('id', flat=True)[:keep]
+    old = list(RecipeRevision.objects.select_for_update().filter(
+        recipe_id=recipe_id, created__lt=before,
+    ).exclude(id__in=list(kept)).order_by('id'))
+    if len(old) < 2:
+        return 0
+    target, merged = old[-1], old[:-1]
+    target.changes = merge_changes(old)
+    target.edits = sum(revision.edits for revision in old)
+    if len({revision.editor_id for revision in old}) > 1:
+        target.editor_id = None
+    RecipeRevision.objects.filter(
+        id__in=[revision.id for revision in merged]).delete()
+    if not target.changes:
+        target.delete()
+        return len(old)
+    target.save(update_fields=['changes', 'edits', 'editor'])
+    return len(merged)
+
+
+def compactable_recipes(keep, before):
+    """Рецепты, у которых может найтись что слить."""
+    return RecipeRevision.objects.values('recipe_id').annotate(
+        total=Count('id'),
+        old=Count('id', filter=Q(created__lt=before)),
+    ).filter(total__gt=keep + 1, old__gt=1).values_list(
+        'recipe_id', flat=True).order_by()
@@ -0,0 +1,12 @@
+from core.jobs import task
+from . import notifications, usage
+
+
+@task(usage.REFRESH_TASK)
+def refresh_ingredient_usage(payload):
+    return {'ingredients': usage.refresh()}
+
+
+@task(notifications.NOTIFY_TASK)
+def notify_subscribers(payload):
+    return {'notified': notifications.notify_subscribers(payload['recipe'])}
@@ -0,0 +1,105 @@
+"""Планы горячих запросов API на заполненной базе.
+
+Запросы берутся из команды check_query_plans; на синтетических данных
+ни один не должен читать таблицу целиком или сортировать результат,
+который можно прочитать из индекса в нужном порядке. Сортировка
+допустима только для запросов с флагом sorts.
+"""
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from users.models import Subscription, User
+from .management.commands.check_query_plans import hot_queries, plan_problems
+from .models import (GroceryList, Ingredient, IngredientUsage, Recipe,
+                     RecipeComponent, UserFavorite)
+
+
+class PlanProblemsTest(TestCase):
+    def test_sqlite_patterns(self):
+        for line, walks_index, problem in (
+            ('SCAN recipes_recipe', False, True),
+            ('SCAN recipes_recipe', True, True),
+            ('SCAN recipes_recipe USING INDEX pub_date_idx', False, True),
+            ('SCAN recipes_recipe USING INDEX pub_date_idx', True, False),
+            ('SCAN t USING COVERING INDEX t_idx', True, False),
+            ('USE TEMP B-TREE FOR ORDER BY', True, True),
+            ('USE TEMP B-TREE FOR RIGHT PART OF ORDER BY', False, True),
+            ('SEARCH recipes_recipe USING INDEX author_idx (author_id=?)',
+             False, False),
+        ):
+            with self.subTest(line=line, walks_index=walks_index):
+                self.assertEqual(
+                    bool(plan_problems(f'5 0 0 {line}', 'sqlite',
+                                       walks_index)),
+                    problem)
+
+    def test_allowed_sort(self):
+        for line, problem in (
+            ('USE TEMP B-TREE FOR ORDER BY', False),
+            ('SCAN recipes_recipe', True),
+        ):
+            with self.subTest(line=line):
+                self.assertEqual(
+                    bool(plan_problems(f'5 0 0 {line}', 'sqlite',
+                                       sorts=True)),
+                    problem)
+
+
+class HotQueryPlansTest(TestCase):
+    USERS = 30
+    RECIPES = 600
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([
+            User(email=f'user{number}@example.com',
+                 username=f'user{number}', first_name='Имя',
+                 last_name='Фамилия')
+            for number in range(cls.USERS)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(50)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(author=users[number % cls.USERS], name=f'Рецепт {number}',
+                   text='Текст', cooking_time=number % 90 + 1,
+                   image='recipes/images/recipe.png')
+            for number in range(cls.RECIPES)
+        ])
+        RecipeComponent.objects.bulk_create([
+            RecipeComponent(recipe=recipe, ingredient=ingredient, amount=10)
+            for number, recipe in enumerate(recipes)
+            for ingredient in ingredients[number % 45:number % 45 + 5]
+        ])
+        now = timezone.now()
+        IngredientUsage.objects.bulk_create([
+            IngredientUsage(ingredient=ingredient, recipes_total=number,
+                            recipes_recent=number % 7, refreshed=now)
+            for number, ingredient in enumerate(ingredients)
+        ])
+        for number, user in enumerate(users):
+            picked = recipes[number::cls.USERS // 2][:40]
+            UserFavorite.objects.bulk_create(
+                [UserFavorite(user=user, recipe=recipe) for recipe in picked])
+            GroceryList.objects.bulk_create(
+                [GroceryList(user=user, recipe=recipe) for recipe in picked])
+            Subscription.objects.bulk_create([
+                Subscription(user=user, author=author)
+                for author in users[number + 1:number + 11]
+            ])
+        cls.user_id = users[0].id
+        cls.recipe_ids = [recipe.id for recipe in recipes[:6]]
+        cls.ingredient_id = ingredients[0].id
+
+    def test_no_full_scans_or_sorts(self):
+        queries = hot_queries(
+            self.user_id, self.recipe_ids, self.ingredient_id)
+        for name, (queryset, walks_index, sorts) in queries.items():
+            with self.subTest(query=name):
+                plan = queryset.explain()
+                self.assertEqual(
+                    plan_problems(plan, connection.vendor, walks_index,
+                                  sorts),
+                    [], plan)
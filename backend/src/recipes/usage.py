@@ -0,0 +1,59 @@
+"""Сводная таблица популярности ингредиентов.
+
+IngredientUsage хранит число рецептов с ингредиентом всего и за последние
+INGREDIENT_USAGE_WINDOW дней. Таблица пересчитывается целиком одним
+сгруппированным запросом: задачей ingredient_usage после изменений
+рецептов (не чаще INGREDIENT_USAGE_REFRESH_INTERVAL) и командой
+refresh_ingredient_usage по расписанию, чтобы окно сдвигалось и без
+правок. Админка, /api/ingredients/popular/ и подсказки по названию
+читают готовые числа вместо подсчёта по всему каталогу.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import IngredientUsage, RecipeComponent
+
+REFRESH_TASK = 'ingredient_usage'
+
+
+def window_start(now):
+    return now - timedelta(
+        days=getattr(settings, 'INGREDIENT_USAGE_WINDOW', 30))
+
+
+@transaction.atomic
+def refresh():
+    """Пересчитывает таблицу; возвращает число используемых ингредиентов."""
+    now = timezone.now()
+    rows = RecipeComponent.objects.filter(
+        recipe__deleted_at__isnull=True,
+    ).values('ingredient_id').annotate(
+        total=Count('recipe_id', distinct=True),
+        recent=Count('recipe_id', distinct=True,
+                     filter=Q(recipe__pub_date__gte=window_start(now))),
+    ).order_by()
+    usage = IngredientUsage.objects.bulk_create(
+        [IngredientUsage(ingredient_id=row['ingredient_id'],
+                         recipes_total=row['total'],
+                         recipes_recent=row['recent'],
+                         refreshed=now)
+         for row in rows],
+        batch_size=5000,
+        update_conflicts=True,
+        unique_fields=['ingredient'],
+        update_fields=['recipes_total', 'recipes_recent', 'refreshed'],
+    )
+    # Ингредиенты, которые больше ни в одном рецепте не встречаются.
+    IngredientUsage.objects.filter(refreshed__lt=now).delete()
+    return len(usage)
+
+
+def schedule_refresh():
+    from core import jobs
+
+    jobs.enqueue(REFRESH_TASK, dedup_key=REFRESH_TASK, delay=timedelta(
+        seconds=getattr(settings, 'INGREDIENT_USAGE_REFRESH_INTERVAL', 300)))
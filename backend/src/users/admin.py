@@ -1,8 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from django.db.models import Count
 
+from core.admin import (
+    EstimatedCountPaginator,
+    SoftDeleteAdminMixin,
+    search_input_filter,
+    subquery_count,
+)
 from .models import User, Subscription
 
 
@@ -17,7 +22,7 @@ class AvatarInline(admin.StackedInline):
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(SoftDeleteAdminMixin, BaseUserAdmin):
     list_display = (
         "id",
         "avatar_thumb",
@@ -41,6 +46,8 @@ class UserAdmin(BaseUserAdmin):
     )
     ordering = ("-date_joined",)
     readonly_fields = ("avatar_thumb",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (
             None,
@@ -73,7 +80,10 @@ class UserAdmin(BaseUserAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.annotate(subs_total=Count("subscribers"))
+        return qs.annotate(
+            subs_total=subquery_count(
+                Subscription.objects.filter(user__deleted_at__isnull=True),
+                "author"))
 
     @admin.display(description="Подписчики")
     def subscriptions_count(self, obj):
@@ -83,9 +93,15 @@ class UserAdmin(BaseUserAdmin):
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "author")
-    list_filter = ("user", "author")
+    list_filter = (
+        search_input_filter("user", "user__username", "подписчику"),
+        search_input_filter("author", "author__username", "автору"),
+    )
+    list_select_related = ("user", "author")
     search_fields = ("user__username", "author__username")
     autocomplete_fields = ("user", "author")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     actions = ["export_subscriptions_csv"]
 
     @admin.action(description="Экспортировать выбранные подписки в CSV")
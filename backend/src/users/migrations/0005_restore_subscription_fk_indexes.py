@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:42
+
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# AlterField пересоздаёт внешние ключи без ON DELETE CASCADE, который
+# ставит recipes.0009_soft_delete; после него каскад возвращается.
+soft_delete = import_module('recipes.migrations.0009_soft_delete')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_subscription_user_recent_index'),
+        ('recipes', '0009_soft_delete'),
+    ]
+
+    operations = [
+        # При откате AlterField снова сбросит каскад: вернуть его последним.
+        migrations.RunPython(
+            migrations.RunPython.noop, soft_delete.add_db_cascade),
+        migrations.RemoveIndex(
+            model_name='subscription',
+            name='subscription_user_recent_idx',
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscribers', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик'),
+        ),
+        migrations.RunPython(
+            soft_delete.add_db_cascade, migrations.RunPython.noop),
+    ]
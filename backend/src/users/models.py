@@ -1,10 +1,17 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as BaseUserManager
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import Q, UniqueConstraint
 from django.contrib.auth.validators import UnicodeUsernameValidator
 
+from core.softdelete import SoftDeleteManager, SoftDeleteModel
 
-class User(AbstractUser):
+
+class UserManager(SoftDeleteManager, BaseUserManager):
+    pass
+
+
+class User(SoftDeleteModel, AbstractUser):
     username = models.CharField(
         verbose_name='Логин', 
         max_length=150,
@@ -46,10 +53,23 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
+    soft_cascade = ('authored_recipes',)
+
+    objects = UserManager()
+    all_objects = BaseUserManager()
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('username',)
+        indexes = [
+            models.Index(fields=['deleted_at'], name='user_deleted_idx',
+                         condition=Q(deleted_at__isnull=False)),
+        ]
+
+    @classmethod
+    def soft_delete_changes(cls, now):
+        return {**super().soft_delete_changes(now), 'is_active': False}
 
     def __str__(self):
         return self.username
@@ -72,6 +92,11 @@ class Subscription(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        indexes = [
+            # Подписчики автора; уникальная пара покрывает обратный порядок.
+            models.Index(fields=['author', 'user'],
+                         name='subscription_author_user_idx'),
+        ]
         constraints = [
             UniqueConstraint(
                 fields=['user', 'author'],